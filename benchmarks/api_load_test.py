@@ -0,0 +1,101 @@
+# Load test for the local HTTP/JSON API against the JSON file store
+# Usage: python benchmarks/api_load_test.py [number of employees] [concurrent clients] [seconds] [write share]
+
+import asyncio # for running many clients at once
+import json # for request bodies
+import os # for the temporary data file
+import random # for choosing requests
+import subprocess # for running the server in its own process
+import sys # for reading the command line and finding the application modules
+import tempfile # for the temporary data directory
+import time # for measuring latency
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem')
+sys.path.insert(0, APP_DIR)
+
+from roster import write_roster
+
+# Send one request over an open connection and read the response. Returns the status code.
+
+async def request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1') + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+# Run one client until the deadline. Returns (kind, latency in seconds, status) for every request.
+
+async def client(port, count, deadline, write_share, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    results = []
+    try:
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if roll < write_share:
+                kind, method, path = 'update', 'PUT', f"/employees/{rng.randint(1, count)}"
+                body = {"salary": rng.randint(2000, 9000)}
+            elif roll < write_share + 0.1:
+                kind, method, path, body = 'search', 'GET', f"/employees/search?q={rng.choice('aeiou')}{rng.choice('nrst')}&limit=20", None
+            elif roll < write_share + 0.3:
+                kind, method, path, body = 'list', 'GET', f"/employees?offset={rng.randint(0, max(count - 50, 0))}&limit=50", None
+            else:
+                kind, method, path, body = 'get', 'GET', f"/employees/{rng.randint(1, count)}", None
+            start = time.perf_counter()
+            status = await request(reader, writer, method, path, body)
+            results.append((kind, time.perf_counter() - start, status))
+    finally:
+        writer.close()
+    return results
+
+# Get a percentile of sorted values.
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+# Create the data file, start the server, run the clients and print throughput and latency per request kind.
+
+async def run(count, clients, seconds, write_share):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'employees.json')
+    write_roster(path, count)
+
+    server = subprocess.Popen([sys.executable, os.path.join(APP_DIR, 'api_server.py'), '--data', path, '--port', '0'],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(server.stdout.readline().rsplit(':', 1)[1].split('/')[0])
+        deadline = time.perf_counter() + seconds
+        all_results = await asyncio.gather(*(client(port, count, deadline, write_share, seed) for seed in range(clients)))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = [result for client_results in all_results for result in client_results]
+    errors = sum(1 for _, _, status in results if status >= 400)
+    print(f"Employees: {count}, clients: {clients}, seconds: {seconds}, write share: {write_share:.0%}")
+    print(f"Requests:  {len(results)} ({len(results) / seconds:.0f}/s), errors: {errors}")
+    for kind in ('get', 'list', 'search', 'update'):
+        latencies = sorted(latency for result_kind, latency, _ in results if result_kind == kind)
+        if latencies:
+            print(f"{kind:8} {len(latencies):8} requests   p50 {percentile(latencies, 50) * 1000:7.2f} ms"
+                  f"   p95 {percentile(latencies, 95) * 1000:7.2f} ms   p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    write_share = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+    asyncio.run(run(count, clients, seconds, write_share))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
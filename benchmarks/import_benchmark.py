@@ -0,0 +1,74 @@
+# Import benchmark comparing serial and parallel validation (cli.py validate --workers) and import (cli.py import --workers)
+# Usage: python benchmarks/import_benchmark.py [--size 1000000] [--workers 1 2 4 8 16]
+#
+# The speedup over one worker is only meaningful up to the number of processors of the machine.
+# The import adds the validated rows to the manager in one process, so it scales less than the validation.
+
+import argparse # for the command line options
+import csv # for writing the roster to import
+import io # for collecting the reports of rejected rows
+import os # for paths and the number of processors
+import shutil # for removing the temporary data
+import sys # for finding the application modules
+import tempfile # for the temporary data files
+import time # for measuring time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem'))
+
+from roster import write_roster, generate_employees # for the synthetic roster
+from parallel_import import validate_file # for the parallel validation
+from cli import import_file # for the parallel import
+from employee_manager import EmployeeManager
+from storage import open_storage
+
+DEFAULT_SIZE = 1000000
+DEFAULT_WORKERS = (1, 2, 4, 8, 16)
+
+# Time a function call in milliseconds and return the time and the result.
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+# Import a CSV file into a new, empty employee file and return the number of imported employees.
+
+def import_roster(directory, path, workers):
+    manager = EmployeeManager(open_storage(os.path.join(directory, f'imported-{workers}.jsonl')))
+    try:
+        return import_file(manager, path, 'csv', workers, io.StringIO())[0]
+    finally:
+        manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and parallel validation and import of a large roster.")
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help="number of employees in the roster")
+    parser.add_argument('--workers', type=int, nargs='+', default=list(DEFAULT_WORKERS), help="worker counts to compare")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='import-benchmark-')
+    try:
+        snapshot_path = os.path.join(directory, 'employees.json')
+        csv_path = os.path.join(directory, 'roster.csv')
+        write_roster(snapshot_path, args.size)
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(('name', 'department', 'salary'))
+            writer.writerows((emp['name'], emp['department'], emp['salary']) for emp in generate_employees(args.size))
+
+        print(f"{args.size} employees, {os.cpu_count()} processors")
+        print(f"{'Workers':>8} {'Validate (ms)':>14} {'Speedup':>8} {'Import (ms)':>12} {'Speedup':>8}")
+        serial = None
+        for workers in args.workers:
+            validate_ms, errors = timed(validate_file, snapshot_path, workers)
+            import_ms, imported = timed(import_roster, directory, csv_path, workers)
+            if errors or imported != args.size:
+                raise RuntimeError(f"Unexpected result with {workers} workers")
+            serial = serial or (validate_ms, import_ms)
+            print(f"{workers:>8} {validate_ms:>14.1f} {serial[0] / validate_ms:>8.2f} "
+                  f"{import_ms:>12.1f} {serial[1] / import_ms:>8.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+# Memory benchmark comparing a list of employee dictionaries with the column-based EmployeeTable
+# Usage: python benchmarks/memory_benchmark.py [number of employees]
+
+import os # for building the path to the application modules
+import sys # for reading the command line and finding the application modules
+import tracemalloc # for measuring allocated memory
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem'))
+
+from records import EmployeeTable # the compact representation
+from roster import generate_employees # the synthetic roster
+
+# Measure the memory held by the structure that build() returns.
+
+def measure(build, count):
+    tracemalloc.start()
+    data = build(generate_employees(count))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return size
+
+# Print the memory used by both representations.
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dict_size = measure(list, count)
+    table_size = measure(EmployeeTable, count)
+    print(f"Employees:        {count}")
+    print(f"List of dicts:    {dict_size / 1e6:8.1f} MB ({dict_size / count:6.1f} bytes per employee)")
+    print(f"EmployeeTable:    {table_size / 1e6:8.1f} MB ({table_size / count:6.1f} bytes per employee)")
+    print(f"Saving:           {100 * (1 - table_size / dict_size):8.1f} %")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Synthetic roster generator for the benchmarks
+# Usage: python benchmarks/roster.py <number of employees> <output file> [seed]
+
+import os # for building the path to the application modules
+import random # for generating a synthetic roster
+import sys # for reading the command line and finding the application modules
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem'))
+
+from json_stream import write_employees, is_json_lines # for writing the roster in the employees.json format
+
+DEPARTMENTS = ['IT', 'Sales', 'Support', 'Finance', 'Marketing', 'Human Resources', 'Logistics']
+
+# Generate employees in the employees.json format.
+# The same count and seed always give the same roster, so benchmark runs can be compared.
+# Names only contain letters, so every record passes the validators.
+# Department names are built with join, so they are new string objects like the ones the JSON parser creates.
+
+def generate_employees(count, seed=0):
+    rng = random.Random(seed)
+    for emp_id in range(1, count + 1):
+        yield {
+            "name": ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 12))).capitalize(),
+            "ID": emp_id,
+            "department": ''.join(rng.choice(DEPARTMENTS)),
+            "salary": rng.randint(2000, 9000)
+        }
+
+# Write a generated roster to a file, one employee at a time.
+# Files ending in .jsonl are written as JSON Lines, other files as an indented JSON list like employees.json.
+
+def write_roster(path, count, seed=0):
+    with open(path, 'w') as file:
+        write_employees(file, generate_employees(count, seed), is_json_lines(path))
+
+if __name__ == "__main__":
+    write_roster(sys.argv[2], int(sys.argv[1]), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
@@ -0,0 +1,205 @@
+# Benchmark suite for EmployeeManager, the validators and the search and sort used by the GUI
+# Usage: python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000] [--operations 1000] [--output results.json]
+#                                            [--compare earlier_results.json] [--no-memory]
+
+import argparse # for the command line options
+import datetime # for the time stamp of a run
+import json # for storing the results
+import os # for paths
+import platform # for describing the machine in the results
+import random # for choosing IDs and search terms
+import shutil # for removing the temporary data
+import subprocess # for reading the current git commit
+import sys # for finding the application modules
+import tempfile # for the temporary data files
+import time # for measuring time
+import tracemalloc # for measuring peak memory
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem'))
+
+from employee_manager import EmployeeManager
+from storage import JSONStorage
+from validators import validate_employees_data, validate_records
+from roster import generate_employees, write_roster
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OPERATIONS = 1000
+SEED = 0
+
+# Search terms and sort orders like the ones typed and clicked in the View Employees tab.
+
+SEARCH_TERMS = ('a', 'an', 'ber', 'sales', 'it', 'ma', 'son', 'xyz')
+SORT_ORDERS = (['name'], ['-salary'], ['department', '-salary'], ['ID'])
+
+# Get a percentile of sorted values (nearest rank).
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+# Summarize the latencies of one benchmark case.
+
+def summarize(latencies, items=None):
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    items = items if items is not None else len(latencies)
+    return {
+        "calls": len(latencies),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(items / total, 1) if total > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4)
+    }
+
+# Time each call of run(i) for i in range(calls). Returns the latencies in seconds.
+
+def time_calls(run, calls):
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        run(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+# Measure the peak memory allocated while run() runs, in megabytes.
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+    finally:
+        tracemalloc.stop()
+
+# Benchmark all cases for one roster size. Every case starts from the same generated roster file.
+# Returns a dictionary from case name to its summary.
+
+def benchmark_size(size, operations, measure_memory):
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, 'roster.json')
+        write_roster(source, size, SEED)
+        rng = random.Random(SEED)
+        results = {}
+
+        # Each case gets a fresh copy of the roster, so the cases do not affect each other.
+        def fresh_manager():
+            path = os.path.join(directory, 'employees.json')
+            for name in os.listdir(directory):
+                if name != 'roster.json':
+                    os.remove(os.path.join(directory, name))
+            shutil.copyfile(source, path)
+            return EmployeeManager(JSONStorage(path))
+
+        def case(name, run_case, items=None, memory_run=None):
+            latencies = run_case()
+            results[name] = summarize(latencies, items)
+            if measure_memory and memory_run is not None:
+                results[name]["peak_memory_mb"] = peak_memory(memory_run)
+            print(f"  {name:28} {results[name]['p50_ms']:10.3f} ms p50 {results[name]['p99_ms']:10.3f} ms p99"
+                  + (f" {results[name]['peak_memory_mb']:9.1f} MB peak" if 'peak_memory_mb' in results[name] else ""))
+
+        manager = fresh_manager()
+        repeats = max(1, min(5, 100000 // size))
+        case("load_employees", lambda: time_calls(lambda i: manager.load_employees(), repeats),
+             items=size * repeats, memory_run=manager.load_employees)
+        case("save_employees", lambda: time_calls(lambda i: manager.save_employees(), repeats),
+             items=size * repeats, memory_run=manager.save_employees)
+        manager.close()
+
+        manager = fresh_manager()
+        case("get_next_employee_id", lambda: time_calls(lambda i: manager.get_next_employee_id(), operations))
+        case("add_employee", lambda: time_calls(lambda i: manager.add_employee("Benchmark", "Sales", 5000), operations))
+        ids = [rng.randint(1, size) for _ in range(operations)]
+        case("update_employee", lambda: time_calls(lambda i: manager.update_employee(ids[i], "Updated", "Support", 6000), operations))
+        removed = rng.sample(range(1, size + 1), min(operations, size))
+        case("remove_employee", lambda: time_calls(lambda i: manager.remove_employee(removed[i]), len(removed)))
+        manager.close()
+
+        employees = list(generate_employees(size, SEED))
+        case("validate_employees_data", lambda: time_calls(lambda i: validate_employees_data(employees), repeats),
+             items=size * repeats, memory_run=lambda: validate_employees_data(employees))
+        case("validate_records", lambda: time_calls(lambda i: validate_records(employees), repeats),
+             items=size * repeats, memory_run=lambda: validate_records(employees))
+        employees = None # free the roster before the next cases
+
+        manager = fresh_manager()
+
+        def build_search_index():
+            manager.search_index = None
+            manager.get_search_index()
+
+        case("search_index_build", lambda: time_calls(lambda i: build_search_index(), 1), items=size,
+             memory_run=build_search_index)
+        terms = [SEARCH_TERMS[i % len(SEARCH_TERMS)] for i in range(operations)]
+        case("search_employees", lambda: time_calls(lambda i: manager.search_employees(terms[i]), operations))
+        case("sort_first", lambda: time_calls(lambda i: manager.get_sorted_employees(SORT_ORDERS[i]), len(SORT_ORDERS)),
+             items=size * len(SORT_ORDERS))
+        case("sort_cached", lambda: time_calls(lambda i: manager.get_sorted_employees(SORT_ORDERS[i % len(SORT_ORDERS)]), 20),
+             items=size * 20)
+        case("sort_search_results", lambda: time_calls(
+            lambda i: manager.get_sorted_employees(SORT_ORDERS[i % len(SORT_ORDERS)], manager.search_employees(terms[i])),
+            min(operations, 100)))
+        manager.close()
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+# Get the current git commit of the repository, or None if git is not available.
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Print the change of the p50 latency of every case compared to an earlier result file.
+
+def compare(results, earlier):
+    print(f"\nCompared with {earlier.get('created')} ({earlier.get('git_commit')}):")
+    for size, cases in results["sizes"].items():
+        earlier_cases = earlier.get("sizes", {}).get(size, {})
+        for name, summary in cases.items():
+            before = earlier_cases.get(name)
+            if before is None or not before.get("p50_ms"):
+                continue
+            change = 100 * (summary["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+            print(f"  {size:>8} {name:28} p50 {before['p50_ms']:10.3f} -> {summary['p50_ms']:10.3f} ms ({change:+6.1f} %)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EmployeeManager, the validators and search and sort.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="roster sizes, for example 1000 1000000")
+    parser.add_argument('--operations', type=int, default=DEFAULT_OPERATIONS, help="calls per add, update, remove and search case")
+    parser.add_argument('--output', help="result file, default: benchmarks/results/benchmark-<time>.json")
+    parser.add_argument('--compare', help="earlier result file to compare with")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurements, which take extra time")
+    args = parser.parse_args()
+
+    created = datetime.datetime.now().isoformat(timespec='seconds')
+    results = {
+        "created": created,
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "operations": args.operations,
+        "sizes": {}
+    }
+    for size in args.sizes:
+        print(f"{size} employees")
+        results["sizes"][str(size)] = benchmark_size(size, args.operations, not args.no_memory)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         f"benchmark-{created.replace(':', '').replace('-', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=4)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            compare(results, json.load(file))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+# Startup benchmark comparing loading the employees before the window is shown (main.py --load-first)
+# with loading them on a background thread after the window is shown (the default),
+# and with opening the same roster as a binary snapshot (employees.bin, see binary_snapshot.py)
+# Usage: python benchmarks/startup_benchmark.py [--sizes 10000 100000 1000000] [--repeat 3]
+#
+# Every start is measured in a fresh Python process, so the imports are timed as well. The window itself is not
+# created, so the benchmark also runs without a display; "window" is the time at which the window could be shown.
+# The peak resident memory of the process is shown where the resource module is available (Linux and macOS).
+
+import argparse # for the command line options
+import importlib # for importing the GUI module only to time it
+import json # for passing the results of a start back from the child process
+import platform # for the unit of the peak memory figure
+import os # for paths
+import shutil # for removing the temporary data
+import subprocess # for starting the fresh processes
+import sys # for finding the application modules
+import tempfile # for the temporary data files
+import time # for measuring time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'managementsystem')
+sys.path.insert(0, APP_DIR)
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+DEFAULT_REPEAT = 3
+MODES = ('load-first', 'background', 'binary')
+
+# Number of rows of the first page, the same as EmployeeGUI.PAGE_SIZE.
+
+PAGE_SIZE = 200
+
+# Start the program the way main.py does, without creating the window, and print the times in milliseconds
+# (since before the first import) at which the modules were imported, the window could be shown,
+# the first page of employees was available and all employees were loaded.
+
+def child(mode, path):
+    start = time.perf_counter()
+    importlib.import_module('gui') # the modules main.py imports, timed but not used here
+    from employee_manager import EmployeeManager
+    from storage import open_storage
+    from background_loader import BackgroundLoader, PROGRESS, DONE
+    imported = time.perf_counter()
+    manager = EmployeeManager(open_storage(path, load_now=mode != 'background'))
+    if mode != 'background':
+        manager.query(limit=PAGE_SIZE)[:]
+        window = first_page = loaded = time.perf_counter()
+    else:
+        loader = BackgroundLoader(manager, PAGE_SIZE)
+        window = time.perf_counter()
+        first_page = None
+        while True:
+            kind, value = loader.results.get()
+            if kind == PROGRESS and value[2] and first_page is None:
+                first_page = time.perf_counter()
+            elif kind == DONE:
+                loaded = time.perf_counter()
+                break
+            elif kind != PROGRESS:
+                raise value
+    times = {name: round((moment - start) * 1000, 1) for name, moment in
+             (("imports", imported), ("window", window), ("first_page", first_page), ("loaded", loaded))}
+    print(json.dumps(dict(times, peak_mb=peak_memory_mb())))
+
+# Get the peak resident memory of this process in megabytes, or None where it cannot be read.
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+# Run one start in a fresh process and return its times.
+
+def measure(mode, path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the startup time of loading first with loading in the background.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="roster sizes, for example 1000 1000000")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="starts per size and mode; the fastest is shown")
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    directory = tempfile.mkdtemp(prefix='startup-benchmark-')
+    try:
+        print(f"{'Employees':>10} {'Mode':12} {'Imports':>10} {'Window':>10} {'First page':>11} {'Loaded':>10} "
+              f"{'Peak (MB)':>10}  (times in ms)")
+        for size in args.sizes:
+            json_path = os.path.join(directory, f'employees-{size}.json')
+            binary_path = os.path.join(directory, f'employees-{size}.bin')
+            # Written by other processes, because the peak memory of this process would be passed on to the starts.
+            subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'roster.py'),
+                            str(size), json_path], check=True)
+            subprocess.run([sys.executable, os.path.join(APP_DIR, 'cli.py'), 'convert',
+                            json_path, binary_path], check=True, stdout=subprocess.DEVNULL)
+            measure(MODES[0], json_path) # the first start writes the history baseline, so it is not counted
+            for mode in MODES:
+                runs = [measure(mode, binary_path if mode == 'binary' else json_path) for _ in range(args.repeat)]
+                best = {name: min((run[name] for run in runs if run[name] is not None), default=None) for name in runs[0]}
+                peak = f"{best['peak_mb']:>10.1f}" if best['peak_mb'] is not None else f"{'-':>10}"
+                print(f"{size:>10} {mode:12} {best['imports']:>10.1f} {best['window']:>10.1f} "
+                      f"{best['first_page']:>11.1f} {best['loaded']:>10.1f} {peak}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
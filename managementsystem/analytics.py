@@ -0,0 +1,227 @@
+# Payroll analytics for the Employee Management System
+
+import math # for percentile interpolation in the pure Python fallback
+
+# NumPy is optional. When it is installed the calculations run on whole columns at once,
+# otherwise the same results are calculated with plain Python loops.
+# It is imported by load_numpy() the first time a calculation needs it, because importing it
+# takes longer than everything else the program imports at startup.
+
+np = None
+numpy_checked = False
+
+# Import NumPy if that has not been tried yet. Returns the module, or None if it is not installed.
+
+def load_numpy():
+    global np, numpy_checked
+    if not numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        numpy_checked = True
+    return np
+
+# Percentiles reported for every department.
+
+PERCENTILES = (10, 25, 75, 90)
+
+# Calculate a percentile of sorted values with linear interpolation (the same method as numpy.percentile).
+
+def percentile(sorted_values, q):
+    position = (len(sorted_values) - 1) * q / 100
+    low = math.floor(position)
+    high = math.ceil(position)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+# Give every department a number (its code) and return the code of each employee as a NumPy array.
+# Returns the array and the dictionary from department name to code.
+
+def department_codes(departments):
+    codes_by_name = {}
+    codes = np.fromiter((codes_by_name.setdefault(dept, len(codes_by_name)) for dept in departments),
+                        dtype=np.int64, count=len(departments))
+    return codes, codes_by_name
+
+# Check if a department name matches the name given to select a department. Names match regardless of case,
+# the same way as the department filter of a search (see SearchIndex.matching_ids).
+
+def same_department(department, selected):
+    return department.lower() == selected.lower()
+
+# Calculate the raised salary the same way as the edit window: salary + int(salary * percent / 100) + amount.
+
+def raised_salary(salary, percent=0.0, amount=0):
+    return salary + int(salary * (percent / 100)) + amount
+
+# Calculate raised salaries for a whole list of salaries in one pass.
+# With NumPy the calculation runs on the whole column at once; the result is a list of Python integers either way.
+
+def adjust_salaries(salaries, percent=0.0, amount=0):
+    if len(salaries) and load_numpy() is not None:
+        values = np.asarray(salaries, dtype=np.int64)
+        return (values + (values * (percent / 100)).astype(np.int64) + amount).tolist()
+    return [raised_salary(salary, percent, amount) for salary in salaries]
+
+# PayrollAnalytics class to calculate salary statistics per department and simulate raises.
+# The data is read from the manager's columns and never changed.
+
+class PayrollAnalytics:
+
+    # Constructor to initialize the PayrollAnalytics with an EmployeeManager.
+    # Set use_numpy to False to force the pure Python calculations.
+
+    def __init__(self, manager, use_numpy=True):
+        self.manager = manager
+        self.numpy_allowed = use_numpy
+
+    # Check if the calculations run with NumPy. NumPy is only imported here, when the first statistics are asked for.
+
+    @property
+    def use_numpy(self):
+        return self.numpy_allowed and load_numpy() is not None
+
+    # Get the statistics of every department, sorted by department name.
+    # Each item is a dictionary with department, count, total, average, median, min, max and p10, p25, p75, p90.
+
+    def department_summary(self):
+        departments, salaries = self.manager.get_salary_columns()
+        if not len(salaries):
+            return []
+        if self.use_numpy:
+            return self.department_summary_numpy(departments, salaries)
+        return self.department_summary_python(departments, salaries)
+
+    # Department statistics with NumPy: salaries are sorted by department code and salary once,
+    # and every statistic is then read from the slice of its department.
+
+    def department_summary_numpy(self, departments, salaries):
+        codes, codes_by_name = department_codes(departments)
+        values = np.asarray(salaries, dtype=np.int64)
+        order = np.lexsort((values, codes))
+        sorted_values = values[order]
+        counts = np.bincount(codes, minlength=len(codes_by_name))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        totals = np.add.reduceat(sorted_values, starts)
+
+        summary = []
+        for dept, code in sorted(codes_by_name.items(), key=lambda item: str(item[0]).lower()):
+            group = sorted_values[starts[code]:starts[code] + counts[code]]
+            row = {
+                "department": dept,
+                "count": int(counts[code]),
+                "total": int(totals[code]),
+                "average": float(totals[code]) / int(counts[code]),
+                "median": float(np.median(group)),
+                "min": int(group[0]),
+                "max": int(group[-1])
+            }
+            for q, value in zip(PERCENTILES, np.percentile(group, PERCENTILES)):
+                row[f"p{q}"] = float(value)
+            summary.append(row)
+        return summary
+
+    # Department statistics with plain Python.
+
+    def department_summary_python(self, departments, salaries):
+        groups = {}
+        for dept, salary in zip(departments, salaries):
+            groups.setdefault(dept, []).append(salary)
+
+        summary = []
+        for dept in sorted(groups, key=lambda name: str(name).lower()):
+            group = sorted(groups[dept])
+            total = sum(group)
+            row = {
+                "department": dept,
+                "count": len(group),
+                "total": total,
+                "average": total / len(group),
+                "median": float(percentile(group, 50)),
+                "min": group[0],
+                "max": group[-1]
+            }
+            for q in PERCENTILES:
+                row[f"p{q}"] = float(percentile(group, q))
+            summary.append(row)
+        return summary
+
+    # Get the statistics of all employees together: count, total, average and median.
+
+    def overall_summary(self):
+        departments, salaries = self.manager.get_salary_columns()
+        if not len(salaries):
+            return {"count": 0, "total": 0, "average": 0.0, "median": 0.0}
+        if self.use_numpy:
+            values = np.asarray(salaries, dtype=np.int64)
+            total = int(values.sum())
+            median = float(np.median(values))
+        else:
+            total = sum(salaries)
+            median = float(percentile(sorted(salaries), 50))
+        return {"count": len(salaries), "total": total, "average": total / len(salaries), "median": median}
+
+    # Simulate a raise without changing any data.
+    # The raise is a percentage and/or a fixed amount, for everyone, one department and/or the employees matching
+    # a search term, selected like EmployeeManager.adjust_salaries does (department names match regardless of case).
+    # Returns the number of affected employees, the old and new payroll totals and the new total per department.
+
+    def simulate_raise(self, percent=0.0, amount=0, department=None, search=None):
+        departments, salaries = self.manager.get_salary_columns()
+        if search:
+            return self.simulate_search_raise(departments, salaries, percent, amount, department, search)
+        if self.use_numpy and len(salaries):
+            codes, codes_by_name = department_codes(departments)
+            values = np.asarray(salaries, dtype=np.int64)
+            if department is None:
+                selected = np.ones(len(values), dtype=bool)
+            else:
+                selected = np.isin(codes, [code for dept, code in codes_by_name.items() if same_department(dept, department)])
+            raised = values + (values * (percent / 100)).astype(np.int64) + amount
+            new_values = np.where(selected, raised, values)
+            old_total = int(values.sum())
+            new_total = int(new_values.sum())
+            affected = int(selected.sum())
+            totals = np.bincount(codes, weights=new_values, minlength=len(codes_by_name))
+            by_department = {dept: int(round(totals[code])) for dept, code in codes_by_name.items()}
+        else:
+            old_total = new_total = affected = 0
+            by_department = {}
+            for dept, salary in zip(departments, salaries):
+                new_salary = salary
+                if department is None or same_department(dept, department):
+                    new_salary = raised_salary(salary, percent, amount)
+                    affected += 1
+                old_total += salary
+                new_total += new_salary
+                by_department[dept] = by_department.get(dept, 0) + new_salary
+        return {
+            "affected": affected,
+            "old_total": old_total,
+            "new_total": new_total,
+            "difference": new_total - old_total,
+            "new_totals_by_department": by_department
+        }
+
+    # Simulate a raise for the employees matching a search term, in the given department if one is given.
+    # Only the matching employees are read; the totals of the others come from the salary columns.
+
+    def simulate_search_raise(self, departments, salaries, percent, amount, department, search):
+        by_department = {}
+        for dept, salary in zip(departments, salaries):
+            by_department[dept] = by_department.get(dept, 0) + salary
+        old_total = sum(by_department.values())
+        difference = 0
+        employees = self.manager.search_employees(search, department)
+        for emp in employees:
+            change = raised_salary(emp['salary'], percent, amount) - emp['salary']
+            by_department[emp['department']] += change
+            difference += change
+        return {
+            "affected": len(employees),
+            "old_total": old_total,
+            "new_total": old_total + difference,
+            "difference": difference,
+            "new_totals_by_department": by_department
+        }
\ No newline at end of file
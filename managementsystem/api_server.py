@@ -0,0 +1,547 @@
+# Author: Luka Niemelä
+# Employee Management System - local HTTP/JSON API
+
+import argparse # for the command line options
+import asyncio # for handling many connections in one thread
+import json # for request and response bodies
+import secrets # for the random part of the ETags
+from collections import OrderedDict # for the response cache
+from http import HTTPStatus # for the reason phrases of status codes
+from urllib.parse import urlsplit, parse_qs # for reading the path and query string
+from employee_manager import EmployeeManager
+from storage import FILE_PATH, open_storage
+from validators import validate_name, validate_department, validate_salary
+
+# Default and largest number of employees returned by one list or search request.
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Largest accepted request body in bytes, enough for bulk requests with many employees.
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+# Number of GET responses kept in the cache.
+
+CACHE_SIZE = 256
+
+# Interval in seconds for checking if another process changed the employee data.
+
+RELOAD_INTERVAL = 2.0
+
+# APIError class for requests that cannot be served, with the HTTP status code to answer with.
+
+class APIError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Read an integer from the query string. Raises APIError if the value is not a number or outside the range.
+
+def query_int(query, name, default, minimum=0, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise APIError(400, f"{name} must be a whole number")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise APIError(400, f"{name} must be between {minimum} and {maximum}" if maximum is not None else f"{name} must be at least {minimum}")
+    return value
+
+# Read a single text value from the query string, or None if it is missing.
+
+def query_str(query, name):
+    values = query.get(name)
+    return values[0] if values else None
+
+# Validate the fields of a new employee with the same checks as the Add Employee tab.
+# Returns a dictionary with name, department and salary. Raises APIError if a field is missing or invalid.
+
+def validate_new_employee(data):
+    if not isinstance(data, dict):
+        raise APIError(400, "Employee must be an object with name, department and salary")
+    try:
+        validate_name(data.get('name'))
+        validate_department(data.get('department'))
+        salary = validate_salary(data.get('salary') if isinstance(data.get('salary'), (int, str)) else '')
+    except (TypeError, ValueError) as e:
+        raise APIError(400, str(e))
+    return {"name": data['name'], "department": data['department'], "salary": salary}
+
+# Validate the fields given for an update. Only name, department and salary may be changed.
+# Returns a dictionary with the given fields. Raises APIError if a field is invalid.
+
+def validate_changes(data):
+    if not isinstance(data, dict):
+        raise APIError(400, "Update must be an object")
+    changes = {}
+    try:
+        if 'name' in data:
+            validate_name(data['name'])
+            changes['name'] = data['name']
+        if 'department' in data:
+            validate_department(data['department'])
+            changes['department'] = data['department']
+        if 'salary' in data:
+            changes['salary'] = validate_salary(data['salary'] if isinstance(data['salary'], (int, str)) else '')
+    except (TypeError, ValueError) as e:
+        raise APIError(400, str(e))
+    return changes
+
+# Check that a value is an employee ID.
+
+def validate_id(value):
+    if type(value) is not int:
+        raise APIError(400, "Employee ID must be a whole number")
+    return value
+
+# EmployeeAPI class to serve the operations of an EmployeeManager over HTTP with JSON bodies.
+# Everything runs in one asyncio event loop, so many connections are handled at once without threads.
+# Reads are answered directly from memory, so they never wait for each other or for the disk.
+# Writes go through one queue and are applied by a single writer task in the order they arrived. All writes
+# that are waiting are applied together and saved with one flush on a worker thread, and each request is
+# answered once its change is on disk. Reads keep being answered while the flush runs. The worker thread never
+# changes the data the reads see: if another process changed the files, the flush is done on the event loop instead,
+# where the changes are merged between two requests. If the save fails, the unsaved changes are dropped and the
+# data is loaded again before the requests are answered with 500, so a failed write never shows up later.
+# Every change of the manager's data (see EmployeeManager.subscribe) raises a generation counter, whether it was made
+# by a write or merged from another process. GET responses carry the counter, behind a random value chosen when
+# the server starts, as their ETag and are cached until it changes, and a request with a matching If-None-Match
+# header is answered with 304 Not Modified.
+#
+# Routes:
+#   GET    /employees?offset=&limit=&order_by=       list employees, for example order_by=department,-salary
+#   GET    /employees?order_by=&limit=&cursor=       the page after the one that returned next_cursor
+#   POST   /employees                                add an employee
+#   GET    /employees/search?q=&department=&offset=&limit=&order_by=&cursor=
+#   GET    /employees/<ID>                           get one employee
+#   GET    /employees/<ID>/history?as_of=            all saved changes of an employee, or the employee at a date or time
+#   PUT    /employees/<ID> (or PATCH)                change name, department and/or salary
+#   DELETE /employees/<ID>                           remove an employee
+#   POST   /employees/bulk                           {"add": [...], "update": [...], "remove": [IDs]} as one batch
+
+class EmployeeAPI:
+
+    # Constructor to initialize the EmployeeAPI with an EmployeeManager.
+
+    def __init__(self, manager, reload_interval=RELOAD_INTERVAL, cache_size=CACHE_SIZE):
+        self.manager = manager
+        self.reload_interval = reload_interval
+        self.cache_size = cache_size
+        self.generation = 0
+        self.instance = secrets.token_hex(8)
+        self.cache = OrderedDict()
+        self.writes = None
+        self.writer_task = None
+        self.server = None
+        self.manager.subscribe(self.data_changed)
+
+    # Start the writer task and listen for connections on the given address.
+    # The storage is switched to deferred mode, so changes are only written by the writer task's flush.
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.manager.storage.deferred = True
+        self.writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.run_writer())
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    # Stop listening, write everything that is still pending and go back to writing every change immediately.
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+        self.manager.storage.deferred = False
+        self.manager.storage.flush()
+
+    # Get the port the server listens on, useful when it was started on port 0.
+
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    # Queue a write and wait until it is applied and saved. operation is called with the manager.
+
+    async def write(self, operation):
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((operation, future))
+        return await future
+
+    # Main loop of the single writer.
+    # All waiting writes are applied one after another, then saved with a single flush.
+    # If the flush fails, the changes of all writes in it are undone (see discard_pending) and every one of them
+    # is answered with the error.
+    # When no write arrives for reload_interval seconds, changes made by other processes are merged instead.
+
+    async def run_writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = [await asyncio.wait_for(self.writes.get(), self.reload_interval)]
+            except asyncio.TimeoutError:
+                self.check_for_changes()
+                continue
+            while not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            results = []
+            for operation, future in batch:
+                try:
+                    results.append((future, operation(self.manager), None))
+                except Exception as e:
+                    results.append((future, None, e))
+
+            storage = self.manager.storage
+            try:
+                if not await loop.run_in_executor(None, storage.flush, False):
+                    storage.flush()
+                save_error = None
+            except Exception as e:
+                save_error = APIError(500, f"Could not save changes: {e}")
+                try:
+                    storage.discard_pending()
+                except Exception:
+                    pass # the files cannot be read either, so the changes stay pending for the next flush
+            self.manager.apply_changes(storage.take_changes())
+
+            for future, result, error in results:
+                if future.done():
+                    continue
+                if error is None and save_error is not None:
+                    error = save_error
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    # Merge the changes other processes made to the data, without waiting if one of them is writing.
+
+    def check_for_changes(self):
+        try:
+            self.manager.reload_if_changed(blocking=False)
+        except OSError:
+            pass
+
+    # Move to a new generation, which makes every cached response and ETag stale.
+    # Called by the manager with the changes after every change.
+
+    def data_changed(self, changes=None):
+        self.generation += 1
+        self.cache.clear()
+
+    # Get the ETag of the current generation.
+    # The counter starts again at 0 whenever a server starts, so it is prefixed with a random value chosen at start.
+    # An ETag from before a restart, or from another server on the same data, then never matches by accident.
+
+    def etag(self):
+        return f'"{self.instance}-{self.generation}"'
+
+    # Handle one connection. Requests are read one after another as long as the client keeps the connection open.
+    # A request whose head cannot be read is answered with its error and the connection is closed,
+    # because the rest of the request cannot be told apart from the next one.
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await self.read_head(reader)
+                except APIError as e:
+                    await self.send(writer, e.status, {"error": str(e)}, {}, False)
+                    break
+                if head is None:
+                    break
+                parts, headers = head
+
+                keep_alive = len(parts) == 3 and (
+                    headers.get('connection', '').lower() == 'keep-alive' if parts[2] == 'HTTP/1.0'
+                    else headers.get('connection', '').lower() != 'close')
+                try:
+                    if len(parts) != 3:
+                        raise APIError(400, "Malformed request line")
+                    body = await self.read_body(reader, headers)
+                    status, payload, extra_headers = await self.dispatch(parts[0], parts[1], headers, body)
+                except APIError as e:
+                    status, payload, extra_headers = e.status, {"error": str(e)}, {}
+                    keep_alive = keep_alive and e.status not in (400, 413)
+                except ValueError as e:
+                    status, payload, extra_headers = 400, {"error": str(e)}, {}
+                except Exception as e:
+                    status, payload, extra_headers = 500, {"error": f"Internal error: {e}"}, {}
+                await self.send(writer, status, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # Read the request line and the headers. Returns the parts of the request line and the headers by lower-case name,
+    # or None if the client closed the connection. A line longer than the stream's limit raises APIError with
+    # 414 for the request line and 431 for a header.
+
+    async def read_head(self, reader):
+        try:
+            request_line = await reader.readline()
+        except ValueError:
+            raise APIError(414, "Request line is too long")
+        if not request_line.strip():
+            return None
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise APIError(431, "Request header is too long")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return request_line.decode('latin-1').split(), headers
+
+    # Read the request body given by the Content-Length header.
+
+    async def read_body(self, reader, headers):
+        if 'transfer-encoding' in headers:
+            raise APIError(400, "Chunked request bodies are not supported, send Content-Length")
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise APIError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise APIError(413, "Request body is too large")
+        return await reader.readexactly(length) if length > 0 else b''
+
+    # Write a response. payload is a JSON-serializable value, already encoded bytes, or None for an empty body.
+
+    async def send(self, writer, status, payload, extra_headers, keep_alive):
+        if payload is None:
+            body = b''
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        if body or status not in (204, 304):
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        for name, value in extra_headers.items():
+            lines.append(f"{name}: {value}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    # Find the handler for a request and run it. Returns the status code, payload and extra headers.
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+        if not parts or parts[0] != 'employees' or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'history'):
+            raise APIError(404, "Not found")
+
+        if len(parts) == 1:
+            if method == 'GET':
+                return self.cached(target, headers, lambda: self.list_employees(query))
+            if method == 'POST':
+                return await self.add_employee(self.parse_json(body))
+            raise APIError(405, "Method not allowed")
+        if parts[1] == 'search':
+            if method != 'GET':
+                raise APIError(405, "Method not allowed")
+            return self.cached(target, headers, lambda: self.search_employees(query))
+        if parts[1] == 'bulk':
+            if method != 'POST':
+                raise APIError(405, "Method not allowed")
+            return await self.bulk(self.parse_json(body))
+
+        try:
+            emp_id = int(parts[1])
+        except ValueError:
+            raise APIError(404, "Not found")
+        if len(parts) == 3:
+            if method != 'GET':
+                raise APIError(405, "Method not allowed")
+            return self.cached(target, headers, lambda: self.employee_history(emp_id, query))
+        if method == 'GET':
+            return self.cached(target, headers, lambda: self.get_employee(emp_id))
+        if method in ('PUT', 'PATCH'):
+            return await self.update_employee(emp_id, self.parse_json(body))
+        if method == 'DELETE':
+            return await self.remove_employee(emp_id)
+        raise APIError(405, "Method not allowed")
+
+    # Decode a JSON request body.
+
+    @staticmethod
+    def parse_json(body):
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise APIError(400, "Request body must be valid JSON")
+
+    # Answer a GET request from the cache, or build the response and cache it.
+    # If the client already has the current generation (If-None-Match), answer 304 without a body.
+
+    def cached(self, target, headers, build):
+        etag = self.etag()
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            if '*' in tags or etag in tags or 'W/' + etag in tags:
+                return 304, None, {"ETag": etag}
+        entry = self.cache.get(target)
+        if entry is not None and entry[0] == self.generation:
+            self.cache.move_to_end(target)
+            body = entry[1]
+        else:
+            body = json.dumps(build()).encode('utf-8')
+            self.cache[target] = (self.generation, body)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return 200, body, {"ETag": etag}
+
+    # List employees one page at a time, in ID order or sorted by the order_by fields.
+
+    def list_employees(self, query):
+        return self.query_page(query, None)
+
+    # Search employees by name or department, optionally only in one department, one page at a time.
+
+    def search_employees(self, query):
+        return self.query_page(query, {'search': query_str(query, 'q') or '', 'department': query_str(query, 'department')})
+
+    # Run a query for one page of employees. With order_by, the next page can be asked for with the returned
+    # next_cursor (?cursor=) instead of an offset, which stays correct while employees are added or removed.
+
+    def query_page(self, query, filter):
+        offset = query_int(query, 'offset', 0)
+        limit = query_int(query, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT)
+        order_by = query_str(query, 'order_by')
+        try:
+            result = self.manager.query(filter=filter, order_by=order_by.split(',') if order_by else None,
+                                        offset=offset, limit=limit, cursor=query_str(query, 'cursor'))
+            employees, next_cursor = result.page()
+        except ValueError as e:
+            raise APIError(400, str(e))
+        return {"total": result.total, "offset": offset, "limit": limit, "employees": employees, "next_cursor": next_cursor}
+
+    # Get one employee by ID.
+
+    def get_employee(self, emp_id):
+        emp = self.manager.get_employee(emp_id)
+        if emp is None:
+            raise APIError(404, f"Employee ID {emp_id} not found")
+        return emp
+
+    # Get all saved changes of an employee, or with ?as_of=<date or time> the employee as they were at that time.
+
+    def employee_history(self, emp_id, query):
+        as_of = query_str(query, 'as_of')
+        if as_of is None:
+            return {"ID": emp_id, "history": self.manager.get_employee_history(emp_id)}
+        emp = self.manager.get_employee_as_of(emp_id, as_of)
+        if emp is None:
+            raise APIError(404, f"Employee ID {emp_id} did not exist at {as_of}")
+        return emp
+
+    # Add an employee through the writer.
+
+    async def add_employee(self, data):
+        emp = validate_new_employee(data)
+        new_employee = await self.write(lambda manager: dict(manager.add_employee(emp['name'], emp['department'], emp['salary'])))
+        return 201, new_employee, {"Location": f"/employees/{new_employee['ID']}"}
+
+    # Change an employee through the writer. Fields that are not given keep their value.
+
+    async def update_employee(self, emp_id, data):
+        changes = validate_changes(data)
+
+        def update(manager):
+            emp = manager.get_employee(emp_id)
+            if emp is None:
+                raise APIError(404, f"Employee ID {emp_id} not found")
+            emp.update(changes)
+            manager.update_employee(emp_id, emp['name'], emp['department'], emp['salary'])
+            return emp
+
+        return 200, await self.write(update), {}
+
+    # Remove an employee through the writer.
+
+    async def remove_employee(self, emp_id):
+        def remove(manager):
+            if manager.get_employee(emp_id) is None:
+                raise APIError(404, f"Employee ID {emp_id} not found")
+            manager.remove_employee(emp_id)
+
+        await self.write(remove)
+        return 204, None, {}
+
+    # Add, update and remove many employees as one batch: if any part fails, nothing is changed.
+    # Every item is validated before the batch is queued.
+
+    async def bulk(self, data):
+        if not isinstance(data, dict):
+            raise APIError(400, "Bulk request must be an object with add, update and/or remove lists")
+        adds = data.get('add', [])
+        updates = data.get('update', [])
+        removes = data.get('remove', [])
+        if not all(isinstance(items, list) for items in (adds, updates, removes)):
+            raise APIError(400, "add, update and remove must be lists")
+        adds = [validate_new_employee(item) for item in adds]
+        updates = [dict(validate_changes(item), ID=validate_id(item.get('ID'))) for item in updates]
+        removes = [validate_id(emp_id) for emp_id in removes]
+
+        def run(manager):
+            with manager.batch():
+                added = manager.add_employees(adds)
+                try:
+                    manager.update_many(updates)
+                except ValueError as e:
+                    raise APIError(404, str(e))
+                for emp_id in removes:
+                    if manager.get_employee(emp_id) is None:
+                        raise APIError(404, f"Employee ID {emp_id} not found")
+                    manager.remove_employee(emp_id)
+            return {"added": [dict(emp) for emp in added], "updated": len(updates), "removed": len(removes)}
+
+        return 200, await self.write(run), {}
+
+
+# Run the server until it is interrupted, then save everything and close the storage.
+
+async def serve(manager, host, port):
+    api = EmployeeAPI(manager)
+    await api.start(host, port)
+    print(f"Serving employees on http://{host}:{api.port()}/employees", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+# This is the entry point for the API server, for example "python api_server.py --port 8080".
+# The server only listens on this computer unless another host is given.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the employee data as a local HTTP/JSON API.")
+    parser.add_argument('--data', default=FILE_PATH, help="employee data file (.json, .jsonl or an SQLite .db file)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on, default: 127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on, default: 8080")
+    args = parser.parse_args()
+    manager = EmployeeManager(open_storage(args.data))
+    try:
+        asyncio.run(serve(manager, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.compact()
+        manager.close()
\ No newline at end of file
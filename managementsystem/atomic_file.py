@@ -0,0 +1,95 @@
+# Helper functions for crash-safe file writes
+
+import os # for renaming, fsync and file existence check
+import secrets # for the random part of the temporary file name
+import stat # for the permission bits of the target
+
+# Write a file atomically.
+# The data is written to a temporary file in the same directory, flushed to disk with fsync and then renamed over the target,
+# so a crash in the middle of a save leaves either the old file or the new file, never a truncated one.
+# If backups is greater than 0, the previous versions are kept as path.1, path.2, ... (path.1 is the newest).
+# The file object passed to write is opened in text mode, or in binary mode if binary is True.
+# The new file keeps the permissions of the file it replaces, or gets the usual permissions of a new file
+# if there was none, so files shared between users stay shared.
+
+def atomic_write(path, write, backups=0, binary=False):
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = current_mode(path)
+    fd, tmp_path = create_temp_file(directory, os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        if backups > 0:
+            rotate_backups(path, backups)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(directory)
+
+# Create a new, empty temporary file for a file name in a directory and open it for writing.
+# The file is created with the permissions open() would give a new file (0o666 less the umask), unlike
+# tempfile.mkstemp, which makes it readable by the owner only. Returns the file descriptor and the path.
+
+def create_temp_file(directory, name):
+    while True:
+        tmp_path = os.path.join(directory, f'.{name}.{secrets.token_hex(4)}.tmp')
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+# Get the permission bits of a file, or None if it does not exist.
+
+def current_mode(path):
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return None
+
+# Shift the existing backups one step (path.1 -> path.2, ...) and move the current file to path.1.
+# The oldest backup is dropped when there are more than the given number of backups.
+
+def rotate_backups(path, backups):
+    for i in range(backups - 1, 0, -1):
+        older = f"{path}.{i}"
+        if os.path.exists(older):
+            os.replace(older, f"{path}.{i + 1}")
+    if os.path.exists(path):
+        os.replace(path, f"{path}.1")
+
+# Get the identity of the current version of a file as [inode, size], or None if it does not exist.
+# atomic_write always renames a new file into place, so every version it writes has a new inode,
+# while renaming a version to a backup keeps it.
+
+def file_stamp(path):
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [info.st_ino, info.st_size]
+
+# Get the paths of the backups of a file, newest first.
+
+def backup_paths(path, backups):
+    return [f"{path}.{i}" for i in range(1, backups + 1)]
+
+# Flush the directory entry so the rename itself survives a crash.
+# Not all platforms (for example Windows) allow opening a directory, so errors are ignored.
+
+def fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
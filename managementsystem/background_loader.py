@@ -0,0 +1,55 @@
+# Background thread that loads employee data at startup
+
+import queue # for passing progress reports to the Tk thread
+import threading # for the loader thread
+
+# Kinds of reports put in the result queue.
+
+PROGRESS = 'progress'
+DONE = 'done'
+FAILED = 'failed'
+
+# BackgroundLoader class to load the employees of a manager while the window is already shown.
+# The manager must not be used by anything else until the loader reports DONE or FAILED.
+# Like PersistenceWorker, the loader never calls Tk itself. Reports are put in a queue that the GUI reads with
+# root.after (see poll_results): (PROGRESS, (loaded, fraction, preview)) while the file is read, where preview
+# holds the first employees read until preview_size have been reported, then (DONE, None) or (FAILED, error).
+
+class BackgroundLoader:
+
+    # Constructor to start the loader thread for the given EmployeeManager.
+
+    def __init__(self, manager, preview_size):
+        self.manager = manager
+        self.preview_size = preview_size
+        self.loaded = 0
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='BackgroundLoader', daemon=True)
+        self.thread.start()
+
+    # Main function of the loader thread.
+
+    def run(self):
+        try:
+            self.manager.load_employees(progress=self.report)
+            self.results.put((DONE, None))
+        except Exception as e:
+            self.results.put((FAILED, e))
+
+    # Report the employees read so far. Only the first preview_size employees are passed on,
+    # so the queue never holds more than a page of records however slowly the GUI reads it.
+
+    def report(self, batch, position, size):
+        preview = batch[:self.preview_size - self.loaded] if self.loaded < self.preview_size else None
+        self.loaded += len(batch)
+        self.results.put((PROGRESS, (self.loaded, position / size if size else 1.0, preview)))
+
+    # Get the reports put in the queue since the last call.
+
+    def poll_results(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
\ No newline at end of file
@@ -0,0 +1,354 @@
+# Compact binary snapshot format for employee data
+
+import mmap # for reading the file on demand instead of loading it
+import struct # for the file header
+import sys # for the byte order of this machine and interning department names
+from array import array # for the fixed-width columns
+from bisect import bisect_left # for finding an ID in the offset index
+from records import EmployeeTable # for the table that the snapshot turns into when it is changed
+from atomic_file import atomic_write # for writing converted files safely
+from json_stream import read_employees, write_employees, is_json_lines # for converting from and to JSON
+
+# Layout of a binary snapshot (all numbers little-endian, every section starts at a multiple of 8 bytes):
+#   header          magic, version, employee count, string count, largest ID and the start of every section
+#   IDs             one signed 64-bit integer per employee, in table order
+#   salaries        one signed 64-bit integer per employee
+#   names           one unsigned 32-bit string number per employee
+#   departments     one unsigned 32-bit string number per employee
+#   string offsets  one unsigned 64-bit byte offset per string into the string data, plus the end of the last string
+#   string data     all distinct names and departments as UTF-8, each stored once
+#   index IDs       the IDs sorted, as signed 64-bit integers
+#   index rows      the row of each sorted ID, as unsigned 32-bit integers
+# The file ends after the index rows. A record is read by looking up its row in the columns, and an ID by a
+# binary search in the index, so nothing has to be decoded before it is used.
+
+MAGIC = b'EMPS'
+VERSION = 1
+SECTIONS = ('ids', 'salaries', 'names', 'departments', 'string_offsets', 'strings', 'index_ids', 'index_rows', 'end')
+HEADER = struct.Struct('<4sIQQq' + 'Q' * len(SECTIONS))
+
+# Array type code of each section that holds numbers.
+
+SECTION_TYPES = {'ids': 'q', 'salaries': 'q', 'names': 'I', 'departments': 'I',
+                 'string_offsets': 'Q', 'index_ids': 'q', 'index_rows': 'I'}
+
+# Largest number of rows and strings, limited by the 32-bit string numbers and rows.
+
+MAX_ROWS = 2 ** 32 - 1
+
+# Check if a path uses the binary snapshot format.
+
+def is_binary(path):
+    return path.lower().endswith('.bin')
+
+# Get the ID, name, department and salary columns of employees.
+# An EmployeeTable already keeps its employees in columns; other employees are read one at a time.
+# Raises ValueError if an employee has other fields, because they cannot be stored in the binary format.
+
+def employee_columns(employees):
+    if isinstance(employees, EmployeeTable):
+        return employees.ids, employees.names, employees.departments, employees.salaries
+    ids, names, departments, salaries = [], [], [], []
+    for emp in employees:
+        if len(emp) != 4:
+            raise ValueError("Only name, ID, department and salary can be stored in a binary snapshot")
+        ids.append(emp['ID'])
+        names.append(emp['name'])
+        departments.append(emp['department'])
+        salaries.append(emp['salary'])
+    return ids, names, departments, salaries
+
+# Build an array of fixed-width integers from a column.
+# Raises ValueError if a value is not an integer or does not fit.
+
+def integer_column(typecode, values):
+    try:
+        return values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    except (TypeError, OverflowError):
+        raise ValueError("IDs and salaries must be whole numbers that fit in 64 bits to be stored in a binary snapshot")
+
+# Write employees to a binary file object in the binary snapshot format.
+# Raises ValueError if the employees cannot be stored in the format or have duplicate IDs.
+
+def write_binary(file, employees):
+    ids, names, departments, salaries = employee_columns(employees)
+    count = len(ids)
+    if count > MAX_ROWS:
+        raise ValueError("Too many employees for a binary snapshot")
+    strings = {}
+    name_numbers = array('I', [strings.setdefault(name, len(strings)) for name in names])
+    department_numbers = array('I', [strings.setdefault(department, len(strings)) for department in departments])
+    if not all(type(text) is str for text in strings):
+        raise ValueError("Names and departments must be text to be stored in a binary snapshot")
+    encoded = [text.encode('utf-8') for text in strings]
+    string_offsets = array('Q', [0])
+    end = 0
+    for data in encoded:
+        end += len(data)
+        string_offsets.append(end)
+    id_column = integer_column('q', ids)
+    order = sorted(range(count), key=id_column.__getitem__)
+    index_ids = array('q', [id_column[row] for row in order])
+    if any(index_ids[i] == index_ids[i + 1] for i in range(count - 1)):
+        raise ValueError("Duplicate employee IDs found")
+
+    sections = {'ids': id_column, 'salaries': integer_column('q', salaries), 'names': name_numbers,
+                'departments': department_numbers, 'string_offsets': string_offsets, 'strings': b''.join(encoded),
+                'index_ids': index_ids, 'index_rows': array('I', order)}
+    starts = []
+    position = HEADER.size
+    for name in SECTIONS[:-1]:
+        position += -position % 8
+        starts.append(position)
+        section = sections[name]
+        position += len(section) * (section.itemsize if isinstance(section, array) else 1)
+    starts.append(position)
+
+    file.write(HEADER.pack(MAGIC, VERSION, count, len(strings), max(id_column) if count else 0, *starts))
+    position = HEADER.size
+    for name, start in zip(SECTIONS[:-1], starts):
+        file.write(b'\0' * (start - position))
+        section = sections[name]
+        if isinstance(section, array) and sys.byteorder != 'little':
+            section = section[:]
+            section.byteswap()
+        data = section.tobytes() if isinstance(section, array) else section
+        file.write(data)
+        position = start + len(data)
+
+# MappedEmployeeTable class to read a binary snapshot on demand.
+# The file is mapped into memory with mmap and its columns are used in place, so opening even a large roster
+# takes no time and only the pages of the records that are read are loaded from disk.
+# The table can be used like an EmployeeTable. The first change turns it into an EmployeeTable in memory
+# (see materialize), which decodes all columns at once; that is still much faster than parsing JSON.
+# Raises ValueError if the file is not a valid binary snapshot.
+
+class MappedEmployeeTable:
+
+    # Constructor to map the snapshot at the given path and check its layout.
+
+    def __init__(self, path):
+        self.table = None
+        with open(path, 'rb') as file:
+            try:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError("Invalid binary snapshot: the file is empty")
+        if len(self.map) < HEADER.size:
+            raise ValueError("Invalid binary snapshot: the header is incomplete")
+        magic, version, self.count, string_count, self.largest_id, *starts = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Invalid binary snapshot: unknown format or version")
+        sizes = {'ids': self.count, 'salaries': self.count, 'names': self.count, 'departments': self.count,
+                 'string_offsets': string_count + 1, 'index_ids': self.count, 'index_rows': self.count}
+        if starts[-1] != len(self.map) or starts[0] < HEADER.size or starts != sorted(starts):
+            raise ValueError("Invalid binary snapshot: the sections do not match the file size")
+        view = memoryview(self.map)
+        columns = {}
+        for name, start, end in zip(SECTIONS, starts, starts[1:]):
+            if name == 'strings':
+                columns[name] = view[start:end]
+                continue
+            typecode = SECTION_TYPES[name]
+            size = sizes[name] * array(typecode).itemsize
+            if end - start < size:
+                raise ValueError("Invalid binary snapshot: the sections do not match the file size")
+            columns[name] = mapped_column(view[start:start + size], typecode)
+        self.ids = columns['ids']
+        self.salary_column = columns['salaries']
+        self.name_numbers = columns['names']
+        self.department_numbers = columns['departments']
+        self.string_offsets = columns['string_offsets']
+        self.strings = columns['strings']
+        self.index_ids = columns['index_ids']
+        self.index_rows = columns['index_rows']
+        if self.string_offsets[-1] > len(self.strings):
+            raise ValueError("Invalid binary snapshot: the string table is incomplete")
+        self.department_cache = {}
+        self.department_column = None
+
+    # Get the number of employees.
+
+    def __len__(self):
+        return self.count if self.table is None else len(self.table)
+
+    # Check if an employee ID is in the table.
+
+    def __contains__(self, emp_id):
+        if self.table is not None:
+            return emp_id in self.table
+        return self.position(emp_id) is not None
+
+    # Get the row at a position as a dictionary, or a list of dictionaries for a slice.
+
+    def __getitem__(self, pos):
+        if self.table is not None:
+            return self.table[pos]
+        if isinstance(pos, slice):
+            return [self.row(i) for i in range(*pos.indices(self.count))]
+        if pos < 0:
+            pos += self.count
+        if not 0 <= pos < self.count:
+            raise IndexError("Employee table index out of range")
+        return self.row(pos)
+
+    # Iterate over the employees as dictionaries.
+
+    def __iter__(self):
+        if self.table is not None:
+            return iter(self.table)
+        return (self.row(pos) for pos in range(self.count))
+
+    # Build the dictionary for the row at a position.
+
+    def row(self, pos):
+        if self.table is not None:
+            return self.table.row(pos)
+        return {"name": self.string(self.name_numbers[pos]), "ID": self.ids[pos],
+                "department": self.department(self.department_numbers[pos]), "salary": self.salary_column[pos]}
+
+    # Decode a string of the string table.
+
+    def string(self, number):
+        return str(self.strings[self.string_offsets[number]:self.string_offsets[number + 1]], 'utf-8')
+
+    # Decode a department name. There are few departments, so each is decoded once and shared by all its employees.
+
+    def department(self, number):
+        text = self.department_cache.get(number)
+        if text is None:
+            text = self.department_cache[number] = sys.intern(self.string(number))
+        return text
+
+    # Find the row of an employee ID in the offset index, or None if there is no such employee.
+
+    def position(self, emp_id):
+        if type(emp_id) is not int:
+            return None
+        i = bisect_left(self.index_ids, emp_id)
+        if i < self.count and self.index_ids[i] == emp_id:
+            return self.index_rows[i]
+        return None
+
+    # Get an employee by ID as a dictionary, or None if there is no such employee.
+
+    def get(self, emp_id):
+        if self.table is not None:
+            return self.table.get(emp_id)
+        pos = self.position(emp_id)
+        return None if pos is None else self.row(pos)
+
+    # Get the largest ID in the table, or 0 if the table is empty. It is stored in the header.
+
+    def max_id(self):
+        return self.largest_id if self.table is None else self.table.max_id()
+
+    # Get the department of every employee, for the payroll statistics. Decoded once while the file is mapped.
+
+    @property
+    def departments(self):
+        if self.table is not None:
+            return self.table.departments
+        if self.department_column is None:
+            self.department_column = [self.department(number) for number in self.department_numbers]
+        return self.department_column
+
+    # Get the salary of every employee as a copy, so the mapped file can be released while the copy is in use.
+
+    @property
+    def salaries(self):
+        if self.table is not None:
+            return self.table.salaries
+        return array('q', self.salary_column)
+
+    # Get the names of the employees and the index from ID to row. These are only used to change the table,
+    # so the table is decoded into memory first.
+
+    @property
+    def names(self):
+        return self.materialize().names
+
+    @property
+    def index(self):
+        return self.materialize().index
+
+    # Change the table. The table is decoded into memory first, see materialize.
+
+    def append(self, emp):
+        self.materialize().append(emp)
+
+    def update(self, emp_id, name, department, salary):
+        return self.materialize().update(emp_id, name, department, salary)
+
+    def set_salary(self, emp_id, salary):
+        return self.materialize().set_salary(emp_id, salary)
+
+    def remove(self, emp_id):
+        return self.materialize().remove(emp_id)
+
+    # Make a copy of the table as an EmployeeTable in memory.
+
+    def copy(self):
+        return self.to_table() if self.table is None else self.table.copy()
+
+    # Decode the whole snapshot into an EmployeeTable that all later calls use, and release the mapped file.
+    # Returns the EmployeeTable.
+
+    def materialize(self):
+        if self.table is None:
+            self.table = self.to_table()
+            self.ids = self.salary_column = self.name_numbers = self.department_numbers = None
+            self.string_offsets = self.strings = self.index_ids = self.index_rows = self.map = None
+            self.department_column = None
+        return self.table
+
+    # Decode the whole snapshot into a new EmployeeTable.
+    # The string data is decoded with one call; if it is plain ASCII, the byte offsets are also the character
+    # offsets and every string is a slice of the decoded text.
+
+    def to_table(self):
+        text = str(self.strings, 'utf-8')
+        offsets = self.string_offsets
+        if len(text) == len(self.strings):
+            strings = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        else:
+            strings = [self.string(i) for i in range(len(offsets) - 1)]
+        departments = {number: sys.intern(strings[number]) for number in set(self.department_numbers)}
+        table = EmployeeTable()
+        table.ids = array('q', self.ids)
+        table.salaries = array('q', self.salary_column)
+        table.names = [strings[number] for number in self.name_numbers]
+        table.departments = [departments[number] for number in self.department_numbers]
+        table.index = dict(zip(table.ids, range(self.count)))
+        return table
+
+
+# Get a section of the mapped file as a column of numbers.
+# On little-endian machines the bytes are used in place; otherwise they are copied into an array and swapped.
+
+def mapped_column(view, typecode):
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column
+
+# Read the employees of a snapshot in any format: the binary format for .bin files, otherwise JSON or JSON Lines.
+
+def read_snapshot(path):
+    return MappedEmployeeTable(path) if is_binary(path) else read_employees(path)
+
+# Convert a snapshot from one format to another, for example employees.json to employees.bin or back.
+# The formats are chosen by the file extensions (.bin, .jsonl or JSON), and the target is written atomically.
+# The journal, metadata and history files are named after the snapshot without its extension,
+# so a snapshot converted next to the original keeps using them. Returns the number of employees.
+
+def convert_snapshot(source, target):
+    employees = read_snapshot(source)
+    if not is_binary(source):
+        employees = EmployeeTable(employees)
+    if is_binary(target):
+        atomic_write(target, lambda file: write_binary(file, employees), binary=True)
+    else:
+        atomic_write(target, lambda file: write_employees(file, employees, is_json_lines(target)))
+    return len(employees)
\ No newline at end of file
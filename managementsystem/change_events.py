@@ -0,0 +1,86 @@
+# Change notifications for EmployeeManager
+
+# Merge a list of changes into at most one change per employee, in the order the employees were first changed.
+# Each change is ('added' | 'updated' | 'removed', employee before, employee after) like the changes of a storage
+# (see StorageBackend.reload_if_changed); None means everything changed, which a list containing None also becomes.
+# An employee that was added and removed again within the list is left out.
+
+def coalesce_changes(changes):
+    merged = {}
+    for change in changes:
+        if change is None:
+            return None
+        kind, old, new = change
+        emp_id = (new if new is not None else old)['ID']
+        if emp_id in merged:
+            old = merged[emp_id][1]
+        merged[emp_id] = (kind, old, new)
+    result = []
+    for kind, old, new in merged.values():
+        if old is None and new is None:
+            continue
+        result.append(('added' if old is None else 'removed' if new is None else 'updated', old, new))
+    return result
+
+# ChangeNotifier class to pass the changes of an EmployeeManager on to any number of subscribers.
+# A subscriber is a function called with the list of changes (see coalesce_changes), or None if everything may
+# have changed, for example after the data was reloaded. While changes are held, for example during a batch,
+# they are collected and passed on as one coalesced list when they are released, so a bulk edit of 10,000
+# employees is a single call with 10,000 changes rather than 10,000 calls.
+
+class ChangeNotifier:
+
+    # Constructor to initialize the ChangeNotifier without subscribers.
+
+    def __init__(self):
+        self.subscribers = []
+        self.held = None
+
+    # Add a subscriber. Returns the subscriber, so it can be passed to unsubscribe later.
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    # Remove a subscriber added with subscribe.
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    # Check if anyone is listening, so the changes of bulk operations are only built when they are needed.
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    # Pass changes on to the subscribers, or collect them while they are held. An empty list is not passed on,
+    # and nothing is collected while there are no subscribers.
+
+    def publish(self, changes):
+        if not self.subscribers:
+            return
+        if self.held is not None:
+            if changes is None:
+                self.held.append(None)
+            else:
+                self.held.extend(changes)
+        elif changes is None or changes:
+            for callback in list(self.subscribers):
+                callback(changes)
+
+    # Start collecting changes instead of passing them on.
+
+    def hold(self):
+        self.held = []
+
+    # Pass all collected changes on as one coalesced list.
+
+    def release(self):
+        held, self.held = self.held, None
+        if held:
+            self.publish(coalesce_changes(held))
+
+    # Drop the collected changes, for example because a rolled back batch undid them.
+
+    def discard(self):
+        self.held = None
\ No newline at end of file
@@ -0,0 +1,262 @@
+# Author: Luka Niemelä
+# Employee Management System - command line import and export
+
+import argparse # for the command line options
+import csv # for reading and writing CSV files
+import io # for reading a chunk of a file like a file
+import json # for reading and writing JSON Lines files
+import os # for file extensions
+import sys # for standard input, output and error
+from employee_manager import EmployeeManager
+from storage import FILE_PATH, open_storage
+from validators import validate_name, validate_department, validate_salary
+from json_stream import encode_line # for writing JSON Lines records quickly
+from binary_snapshot import convert_snapshot # for converting snapshots between JSON and the binary format
+from parallel_import import split_file, read_range, count_lines, map_chunks, validate_file, worker_count # for using every core on large files
+
+# Number of valid rows handed to the manager at a time. The whole import is still saved with a single write.
+
+CHUNK_ROWS = 10000
+
+# Columns written to exported CSV files, in the same order as the fields of an employee.
+
+CSV_COLUMNS = ('name', 'ID', 'department', 'salary')
+
+# Get the format of a file from its extension: 'csv' for .csv files and 'jsonl' for everything else.
+
+def detect_format(path):
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+# Read rows from a CSV file with a header line. Empty lines are skipped.
+# Yields (line number, row) pairs, where the row is a dictionary from column name to text.
+# A row with fewer values than the header is missing the last columns.
+# If header is given, the file is a later part of a CSV file that has no header line of its own.
+
+def read_csv_rows(file, header=None):
+    reader = csv.reader(file)
+    if header is None:
+        header = read_csv_header(reader)
+    for values in reader:
+        if values:
+            yield reader.line_num, dict(zip(header, values))
+
+# Read the column names from the header line of a CSV reader.
+
+def read_csv_header(reader):
+    return [column.strip() for column in next(reader, [])]
+
+# Read rows from a JSON Lines file, one JSON object per line. Empty lines are skipped.
+# Yields (line number, row) pairs; a line that is not valid JSON is yielded as the error instead of a row.
+
+def read_json_lines_rows(file):
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+# Validate one imported row with the same checks as the Add Employee tab.
+# Returns a dictionary with name, department and salary. An ID in the row is ignored, because every
+# imported employee gets a new ID. Raises ValueError with the reason if the row is rejected.
+
+def validate_row(row):
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object with name, department and salary")
+    name = row.get('name')
+    department = row.get('department')
+    salary = row.get('salary')
+    name = name.strip() if isinstance(name, str) else ''
+    department = department.strip() if isinstance(department, str) else ''
+    validate_name(name)
+    validate_department(department)
+    salary = validate_salary(salary if isinstance(salary, (int, str)) else '')
+    return {"name": name, "department": department, "salary": salary}
+
+# Import employees from a CSV or JSON Lines file.
+# The file is read and validated one row at a time and the valid rows are added in chunks of CHUNK_ROWS
+# inside one batch, so the data is saved once at the end. Rejected rows are reported with their line numbers
+# to the errors stream. Returns the number of imported employees and the list of (line number, reason) pairs.
+
+def import_employees(manager, file, file_format, errors=sys.stderr, chunk_rows=CHUNK_ROWS):
+    rows = read_csv_rows(file) if file_format == 'csv' else read_json_lines_rows(file)
+    return add_chunks(manager, validate_chunks(rows, chunk_rows), errors)
+
+# Import employees from a CSV or JSON Lines file with the given number of worker processes (0 for one per processor).
+# The file is split into chunks that are read and validated by the workers, and the valid rows are added
+# in file order inside one batch. The imported employees, their IDs and the rejected rows are the same
+# as with import_employees; only the validation runs in parallel, adding the rows is still done by this process.
+
+def import_file(manager, path, file_format, workers, errors=sys.stderr):
+    workers = worker_count(workers)
+    if workers == 1:
+        with open(path, 'r', newline='', encoding='utf-8') as file:
+            return import_employees(manager, file, file_format, errors)
+    header = None
+    if file_format == 'csv':
+        with open(path, 'r', newline='', encoding='utf-8') as file:
+            header = read_csv_header(csv.reader(file))
+    ranges = split_file(path, csv_quotes=file_format == 'csv')
+    return add_chunks(manager, offset_lines(map_chunks(parse_rows_chunk, path, ranges, workers, file_format, header)), errors)
+
+# Worker: read and validate the rows of one chunk of a CSV or JSON Lines file.
+# header is the header line of a CSV file, which only the first chunk holds itself.
+# Returns the valid rows, the rejected rows as (line number in the chunk, reason) pairs and the number of lines.
+
+def parse_rows_chunk(path, start, end, file_format, header):
+    text = read_range(path, start, end)
+    file = io.StringIO(text, newline='')
+    if file_format == 'csv':
+        rows = read_csv_rows(file, None if start == 0 else header)
+    else:
+        rows = read_json_lines_rows(file)
+    valid, rejected = [], []
+    for line_number, row in rows:
+        try:
+            valid.append(validate_row(row))
+        except ValueError as e:
+            rejected.append((line_number, str(e)))
+    return valid, rejected, count_lines(text)
+
+# Turn the line numbers of the chunks from parse_rows_chunk into line numbers of the whole file.
+# Yields (valid rows, rejected rows) pairs in file order.
+
+def offset_lines(results):
+    offset = 0
+    for valid, rejected, line_count in results:
+        yield valid, [(offset + line_number, reason) for line_number, reason in rejected]
+        offset += line_count
+
+# Validate rows one at a time and group them into chunks of chunk_rows valid rows.
+# Yields (valid rows, rejected rows) pairs like offset_lines.
+
+def validate_chunks(rows, chunk_rows):
+    chunk = []
+    rejected = []
+    for line_number, row in rows:
+        try:
+            chunk.append(validate_row(row))
+        except ValueError as e:
+            rejected.append((line_number, str(e)))
+            continue
+        if len(chunk) >= chunk_rows:
+            yield chunk, rejected
+            chunk, rejected = [], []
+    yield chunk, rejected
+
+# Add the valid rows of each chunk inside one batch and report the rejected rows to the errors stream.
+# Returns the number of imported employees and the list of (line number, reason) pairs.
+
+def add_chunks(manager, chunks, errors):
+    imported = 0
+    rejected = []
+    with manager.batch():
+        for chunk, chunk_rejected in chunks:
+            for line_number, reason in chunk_rejected:
+                print(f"line {line_number}: {reason}", file=errors)
+            rejected.extend(chunk_rejected)
+            if chunk:
+                manager.add_employees(chunk)
+                imported += len(chunk)
+    return imported, rejected
+
+# Export all employees to a CSV or JSON Lines file, one employee at a time.
+# Returns the number of exported employees.
+
+def export_employees(manager, file, file_format):
+    count = 0
+    if file_format == 'csv':
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(CSV_COLUMNS)
+        for emp in manager.get_employees():
+            writer.writerow([emp[column] for column in CSV_COLUMNS])
+            count += 1
+    else:
+        for emp in manager.get_employees():
+            file.write(encode_line(emp) + '\n')
+            count += 1
+    return count
+
+# Check every record of a snapshot and print one line per error. Returns the exit code.
+
+def validate_snapshot(path, workers):
+    try:
+        errors = validate_file(path, workers)
+    except ValueError as e:
+        print(f"{path}: {e}", file=sys.stderr)
+        return 1
+    for index, message in errors:
+        print(f"record {index + 1}: {message}")
+    print(f"Found {len(errors)} errors")
+    return 1 if errors else 0
+
+# Build the command line parser.
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Import and export employees without the graphical interface.")
+    parser.add_argument('--data', default=FILE_PATH,
+                        help="employee data file (.json, .jsonl, a binary .bin snapshot or an SQLite .db file), default: employees.json")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="add the employees in a CSV or JSON Lines file")
+    import_parser.add_argument('file', help="file to import, or - for standard input")
+    import_parser.add_argument('--format', choices=('csv', 'jsonl'),
+                               help="file format, by default taken from the file extension (.csv or JSON Lines)")
+    import_parser.add_argument('--workers', type=int, default=1,
+                               help="processes that read and validate the file, 0 for one per processor, default: 1")
+
+    export_parser = commands.add_parser('export', help="write all employees to a CSV or JSON Lines file")
+    export_parser.add_argument('file', help="file to write, or - for standard output")
+    export_parser.add_argument('--format', choices=('csv', 'jsonl'),
+                               help="file format, by default taken from the file extension (.csv or JSON Lines)")
+
+    convert_parser = commands.add_parser('convert', help="convert a snapshot between JSON, JSON Lines and the binary format")
+    convert_parser.add_argument('source', help="snapshot to read, for example employees.json")
+    convert_parser.add_argument('target', help="snapshot to write, for example employees.bin")
+
+    validate_parser = commands.add_parser('validate', help="check every record of a JSON or JSON Lines snapshot")
+    validate_parser.add_argument('file', help="snapshot to check, for example employees.json")
+    validate_parser.add_argument('--workers', type=int, default=1,
+                                 help="processes that read and check the file, 0 for one per processor, default: 1")
+    return parser
+
+# Run the command line tool and return the exit code.
+# The exit code is 0 on success and 1 if any imported row was rejected (the valid rows are still imported)
+# or any checked record is invalid.
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    if args.command == 'convert':
+        print(f"Converted {convert_snapshot(args.source, args.target)} employees")
+        return 0
+    if args.command == 'validate':
+        return validate_snapshot(args.file, args.workers)
+    file_format = args.format or detect_format(args.file)
+    manager = EmployeeManager(open_storage(args.data))
+    try:
+        if args.command == 'import':
+            if args.file == '-':
+                imported, rejected = import_employees(manager, sys.stdin, file_format)
+            else:
+                imported, rejected = import_file(manager, args.file, file_format, args.workers)
+            print(f"Imported {imported} employees, rejected {len(rejected)} rows")
+            return 1 if rejected else 0
+        if args.file == '-':
+            count = export_employees(manager, sys.stdout, file_format)
+        else:
+            with open(args.file, 'w', newline='', encoding='utf-8') as file:
+                count = export_employees(manager, file, file_format)
+        print(f"Exported {count} employees", file=sys.stderr if args.file == '-' else sys.stdout)
+        return 0
+    finally:
+        manager.close()
+
+# This is the entry point for the command line tool, for example:
+# "python cli.py import roster.csv", "python cli.py --data employees.db export roster.jsonl"
+# "python cli.py import --workers 0 roster.csv" or "python cli.py convert employees.json employees.bin".
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,97 @@
+# Diagnostics window for the Employee Management System
+
+from tkinter import * # Import all tkinter classes and functions
+from tkinter import ttk # Import ttk for themed widgets
+from instrumentation import INSTRUMENTATION # Import the timing figures shown in the window
+
+# DiagnosticsWindow class to show the timing figures collected by the instrumentation
+# The window is hidden from the menus and opened with Ctrl+Shift+D when the program runs with --instrument.
+
+class DiagnosticsWindow:
+
+    # Define the columns for the treeview that displays the timing figures.
+
+    COLUMNS = ('Function', 'Calls', 'Total (ms)', 'Mean (ms)', 'p50 (ms)', 'p95 (ms)', 'Max (ms)')
+
+    # Figure shown in each column after the function name.
+
+    COLUMN_KEYS = ('calls', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms')
+
+    # Interval in milliseconds for refreshing the figures while the window is open.
+
+    REFRESH_INTERVAL_MS = 1000
+
+    # Constructor to create the window on top of the main window.
+
+    def __init__(self, root):
+        self.window = Toplevel(root)
+        self.window.title("Diagnostics")
+        self.window.geometry('760x420')
+
+        self.tree = ttk.Treeview(self.window, columns=self.COLUMNS, show='headings')
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=220 if col == 'Function' else 80, anchor='w' if col == 'Function' else 'e')
+        self.tree.pack(expand=1, fill='both', padx=5, pady=5)
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.pack(fill=X, padx=5)
+        ttk.Button(button_frame, text="Reset", command=self.reset).pack(side=LEFT)
+        ttk.Button(button_frame, text="Write to Log", command=self.write_log).pack(side=LEFT, padx=5)
+        ttk.Button(button_frame, text="Profile Next Action", command=self.profile_next).pack(side=LEFT)
+        ttk.Button(button_frame, text="Show Last Profile", command=self.show_profile).pack(side=LEFT, padx=5)
+
+        self.status_label = ttk.Label(self.window, text="", anchor='w')
+        self.status_label.pack(fill=X, padx=5, pady=5)
+        self.refresh_job = None
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    # Show the current figures, slowest total first, and refresh them again after REFRESH_INTERVAL_MS.
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for metric in INSTRUMENTATION.summary():
+            self.tree.insert('', 'end', values=[metric['name']] + [metric[key] for key in self.COLUMN_KEYS])
+        self.refresh_job = self.window.after(self.REFRESH_INTERVAL_MS, self.refresh)
+
+    # Forget the figures collected so far.
+
+    def reset(self):
+        INSTRUMENTATION.reset()
+        self.status_label.config(text="Figures reset")
+
+    # Write the current figures to the log file.
+
+    def write_log(self):
+        if INSTRUMENTATION.log_path is None:
+            self.status_label.config(text="No log file; start the program with --instrument-log")
+            return
+        INSTRUMENTATION.write_summary()
+        self.status_label.config(text=f"Figures written to {INSTRUMENTATION.log_path}")
+
+    # Profile the next action done in the main window, such as a sort, search or save.
+
+    def profile_next(self):
+        INSTRUMENTATION.profile_next()
+        self.status_label.config(text="The next action will be profiled")
+
+    # Show the statistics of the last profiled action in a separate window.
+
+    def show_profile(self):
+        if INSTRUMENTATION.last_profile is None:
+            self.status_label.config(text="No action has been profiled yet")
+            return
+        profile_window = Toplevel(self.window)
+        profile_window.title("Last Profile")
+        text = Text(profile_window, wrap=NONE, font=('Courier', 9))
+        text.insert(END, INSTRUMENTATION.last_profile)
+        text.config(state=DISABLED)
+        text.pack(expand=1, fill='both')
+
+    # Stop refreshing and close the window.
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+        self.window.destroy()
\ No newline at end of file
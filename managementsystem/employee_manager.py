@@ -1,42 +1,67 @@
-# EmployeeManager class to manage employee data in a JSON file
+# EmployeeManager class to manage employee data
 
-import json # for JSON file handling
-import os # for file existence check
-from validators import validate_employees_data # for validating employee data
+from contextlib import contextmanager # for the batch context manager
+from storage import FILE_PATH, JSONStorage # for the default JSON file storage
+from search_index import SearchIndex # for fast searches by name and department
+from sort_index import SortIndex, parse_order, sort_key # for cached sort orders
+from analytics import adjust_salaries # for calculating bulk salary changes in one pass
+from change_events import ChangeNotifier # for telling the GUI and other subscribers what changed
+from validators import validate_employee_data, validate_employees_data # for the same checks as loading the data
+from query import (QueryResult, FILTER_KEYS, SORT_MATCHES_SHARE, decode_cursor, salary_predicate,
+                   storage_rows, ordered_rows, sorted_rows) # for lazy, paginated queries
 
 # This class manages employee data, including loading, saving, adding, removing, and updating employees.
+# The data itself is kept by a storage backend (see storage.py); by default the JSON file at FILE_PATH.
+# Every employee that is added or changed is checked with the same rules as loading the data (see validators.py)
+# before it is handed to the storage, so nothing is saved that could not be loaded again.
+# Every change is passed on to the functions added with subscribe (see change_events.py), so the GUI, caches and
+# other layers can update only what changed. The changes of a batch are passed on once, when the batch ends.
 
-# This is the path to the JSON file where employee data is stored.
-
-FILE_PATH = os.path.join(os.path.dirname(__file__), 'employees.json')
 class EmployeeManager:
 
-    # Constructor to initialize the EmployeeManager with a filename.
+    # Constructor to initialize the EmployeeManager with a storage backend.
+    # If no backend is given, the employees are stored in the JSON file at FILE_PATH.
 
-    def __init__(self):
-        self.employee_list = self.load_employees()
+    def __init__(self, storage=None):
+        self.storage = storage if storage is not None else JSONStorage(FILE_PATH)
+        self.in_batch = False
+        self.search_index = None
+        self.sort_index = SortIndex()
+        self.notifier = ChangeNotifier()
 
-    # Load employees from the JSON file.
-    # If the file does not exist or is empty, return an empty list.
+    # Add a function that is called with the list of ('added' | 'updated' | 'removed', employee before, employee after)
+    # changes after every change, or with None if everything may have changed. Returns the function for unsubscribe.
 
-    def load_employees(self):
-        try:
-            with open(FILE_PATH, 'r') as file:
-                employees = json.load(file)
-                validate_employees_data(employees)
-                return employees
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-        except ValueError:
-            return []
+    def subscribe(self, callback):
+        return self.notifier.subscribe(callback)
+
+    # Remove a function added with subscribe.
+
+    def unsubscribe(self, callback):
+        self.notifier.unsubscribe(callback)
 
-    # Save employees to the JSON file.
+    # Reload employees from the storage.
+    # progress, if given, is called while the employees are read (see StorageBackend.load).
+
+    def load_employees(self, progress=None):
+        self.storage.load(progress)
+        self.search_index = None
+        self.sort_index.clear()
+        self.notifier.publish(None)
+        return self.get_employees()
+
+    # Save all pending changes to the storage.
 
     def save_employees(self):
-        with open(FILE_PATH, 'w') as file:
-            json.dump(self.employee_list, file, indent=4)
+        self.storage.save()
+
+    # Write a fresh snapshot of the data, for example before the application closes.
 
-    # Add a new employee to the list and save to the file.
+    def compact(self):
+        self.storage.save()
+
+    # Add a new employee and save it to the storage.
+    # Raises ValueError if the name, department or salary is invalid.
 
     def add_employee(self, name, department, salary):
         new_employee = {
@@ -45,36 +70,304 @@ class EmployeeManager:
             "department": department,
             "salary": salary
         }
-        self.employee_list.append(new_employee)
-        self.save_employees()
+        validate_employee_data(new_employee, set())
+        self.storage.add(new_employee)
+        self.apply_change(('added', None, new_employee))
         return new_employee
     
-    # Remove an employee by ID and save to the file.
+    # Remove an employee by ID and save the change to the storage.
 
     def remove_employee(self, emp_id):
-        self.employee_list = [emp for emp in self.employee_list if emp['ID'] != emp_id]
-        self.save_employees()
+        old = self.get_employee_copy(emp_id)
+        if not self.storage.remove(emp_id):
+            return
+        self.apply_change(('removed', old, None))
 
-    # Update an existing employee's information by ID and save to the file.
+    # Update an existing employee's information by ID and save the change to the storage.
+    # Raises ValueError if the name, department or salary is invalid; nothing is changed then.
 
     def update_employee(self, emp_id, name, department, salary):
-        for emp in self.employee_list:
-            if emp['ID'] == emp_id:
-                emp['name'] = name
-                emp['department'] = department
-                emp['salary'] = salary
-                break
-        self.save_employees()
+        new = {"name": name, "ID": emp_id, "department": department, "salary": salary}
+        validate_employee_data(new, set())
+        old = self.get_employee_copy(emp_id)
+        if not self.storage.update(emp_id, name, department, salary):
+            return
+        self.apply_change(('updated', old, new))
+
+    # Apply a change made by this manager together with the changes of other processes merged while it was written,
+    # so the subscribers are told about them at once.
+
+    def apply_change(self, change):
+        merged = self.storage.take_changes()
+        self.apply_changes(None if merged is None else merged + [change])
+
+    # Get a copy of an employee as it is before a change, for the cached sort orders and the change subscribers.
+
+    def get_employee_copy(self, emp_id):
+        emp = self.storage.get(emp_id)
+        return dict(emp) if emp is not None else None
+
+    # Apply several changes as one transaction.
+    # Inside the with-block nothing is persisted. When the block ends the storage validates the data once
+    # and saves it with a single write. If the block raises an error or validation fails, every change is rolled back.
+    # The subscribers are told about all changes of the block at once when it ends, and not at all if it is rolled back.
+
+    @contextmanager
+    def batch(self):
+        if self.in_batch:
+            yield self
+            return
+        self.in_batch = True
+        self.storage.begin()
+        self.notifier.hold()
+        try:
+            yield self
+            self.storage.commit()
+            self.apply_changes(self.storage.take_changes())
+        except BaseException:
+            self.storage.rollback()
+            self.search_index = None
+            self.sort_index.clear()
+            self.notifier.discard()
+            raise
+        finally:
+            self.in_batch = False
+        self.notifier.release()
+
+    # Add several employees with a single save.
+    # Each item is a dictionary with name, department and salary. Returns the new employees.
+    # If any item is invalid, ValueError is raised and none of them are added.
+    # The employees get consecutive IDs and are handed to the storage together. The search index is updated
+    # one employee at a time, while the cached sort orders are dropped and sorted again on the next use.
+
+    def add_employees(self, employees):
+        next_id = self.get_next_employee_id()
+        new_employees = [{"name": emp['name'], "ID": next_id + i, "department": emp['department'], "salary": emp['salary']}
+                         for i, emp in enumerate(employees)]
+        validate_employees_data(new_employees)
+        with self.batch():
+            self.storage.add_many(new_employees)
+            if self.search_index is not None:
+                for emp in new_employees:
+                    self.search_index.add(emp)
+            if new_employees:
+                self.sort_index.clear()
+            if self.notifier.has_subscribers():
+                self.notifier.publish([('added', None, emp) for emp in new_employees])
+        return new_employees
+
+    # Update several employees with a single save.
+    # Each item is a dictionary with the ID and the fields to change. An unknown ID or an invalid value rolls back
+    # the whole batch.
+
+    def update_many(self, updates):
+        with self.batch():
+            for update in updates:
+                emp = self.get_employee(update['ID'])
+                if emp is None:
+                    raise ValueError(f"Employee ID {update['ID']} not found")
+                self.update_employee(emp['ID'],
+                                     update.get('name', emp['name']),
+                                     update.get('department', emp['department']),
+                                     update.get('salary', emp['salary']))
+
+    # Adjust the salaries of many employees at once.
+    # The raise is a percentage and/or a fixed amount, calculated like in the edit window, for every employee
+    # in the given department (matched regardless of case) and/or matching the search term (everyone if neither is given).
+    # The new salaries are calculated in one pass and saved with a single write; if any salary would become
+    # negative nothing is changed. Returns the number of affected employees and the old and new payroll totals.
+
+    def adjust_salaries(self, percent=0.0, amount=0, department=None, search=None):
+        if department is None and not search:
+            employees = self.get_employees()
+        else:
+            employees = self.search_employees(search or '', department)
+        ids = [emp['ID'] for emp in employees]
+        old_salaries = [emp['salary'] for emp in employees]
+        new_salaries = adjust_salaries(old_salaries, percent, amount)
+        if any(salary < 0 for salary in new_salaries):
+            raise ValueError("Salary cannot be negative")
+
+        old_total = sum(self.get_salary_columns()[1])
+        difference = sum(new_salaries) - sum(old_salaries)
+        changes = []
+        if self.notifier.has_subscribers():
+            changes = [('updated', dict(emp), dict(emp, salary=salary))
+                       for emp, salary in zip(employees, new_salaries) if salary != emp['salary']]
+        with self.batch():
+            self.storage.update_salaries(zip(ids, new_salaries))
+            self.sort_index.clear()
+            self.notifier.publish(changes)
+        return {
+            "affected": len(ids),
+            "old_total": old_total,
+            "new_total": old_total + difference,
+            "difference": difference
+        }
+
+    # Pick up the changes other processes made to the same data since it was loaded (see storage.py).
+    # Only the changed employees are merged, and the search index and cached sort orders are updated with them.
+    # If blocking is False and another process is busy writing, nothing is done and the check can be tried again later.
+    # Returns the list of changes, or None if everything was reloaded.
+
+    def reload_if_changed(self, blocking=True):
+        changes = self.storage.reload_if_changed(blocking)
+        self.apply_changes(changes)
+        return changes
+
+    # Update the search index and cached sort orders with changes, such as the ones merged from other processes,
+    # and pass the changes on to the subscribers.
+    # Each change is ('added' | 'updated' | 'removed', employee before, employee after); None means everything changed.
+
+    def apply_changes(self, changes):
+        if changes is None:
+            self.search_index = None
+            self.sort_index.clear()
+            self.notifier.publish(None)
+            return
+        for kind, old, new in changes:
+            if self.search_index is not None:
+                if new is None:
+                    self.search_index.remove(old['ID'])
+                else:
+                    self.search_index.add(new)
+            if old is not None:
+                self.sort_index.remove(old)
+            if new is not None:
+                self.sort_index.add(new)
+        self.notifier.publish(changes)
+
+    # Get a single employee by ID.
+    # If no employee has the given ID, return None.
+
+    def get_employee(self, emp_id):
+        return self.storage.get(emp_id)
 
     # Get all employees.
 
     def get_employees(self):
-        return self.employee_list
+        return self.storage.all()
+
+    # Get the search index, building it on first use.
+    # After that it is kept up to date with every change (see apply_changes).
+
+    def get_search_index(self):
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.get_employees())
+        return self.search_index
+
+    # Search for employees whose name or department contains the search term (case-insensitive).
+    # If a department is given, only employees in exactly that department are returned.
+
+    def search_employees(self, term, department=None):
+        ids = self.get_search_index().search(term, department)
+        return [self.storage.get(emp_id) for emp_id in ids]
+
+    # Get employees sorted by one or more fields.
+    # order_by is a field name or a list of field names (ID, name, department, salary);
+    # a leading '-' sorts that field in descending order, for example ['department', '-salary'].
+    # Sorting all employees uses a cached order, and an all-descending order is the ascending one read backwards.
+    # A given subset (such as search results) is sorted directly.
+
+    def get_sorted_employees(self, order_by, employees=None):
+        spec = parse_order(order_by)
+        if employees is not None:
+            return sorted(employees, key=lambda emp: sort_key(spec, emp))
+        if all(descending for _, descending in spec):
+            ascending = tuple((field, False) for field, _ in spec)
+            ids = reversed(self.sort_index.sorted_ids(ascending, self.get_employees()))
+        else:
+            ids = self.sort_index.sorted_ids(spec, self.get_employees())
+        return [self.storage.get(emp_id) for emp_id in ids]
+
+    # Query employees lazily, one page at a time (see query.py).
+    # filter is None, a function that gets an employee and returns True to keep it, or a dictionary with any of
+    # search (text in the name or department), department (exact name), min_salary and max_salary.
+    # order_by is like in get_sorted_employees; without it employees come in storage order (ID order for a search).
+    # offset and limit select a page. cursor continues after the page a previous result's page() returned,
+    # which needs the same filter and order_by.
+    # The search index answers search and department, and sorted results are read from the cached sort orders,
+    # so nothing is copied or scanned for a page unless the filter has a function or salary limits.
+
+    def query(self, filter=None, order_by=None, offset=0, limit=None, cursor=None):
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("Offset and limit cannot be negative")
+        spec = parse_order(order_by) if order_by else None
+        if cursor is not None and spec is None:
+            raise ValueError("Paging with a cursor needs an order_by")
+
+        ids = None
+        predicate = None
+        if callable(filter):
+            predicate = filter
+        elif filter:
+            unknown = set(filter) - set(FILTER_KEYS)
+            if unknown:
+                raise ValueError(f"Cannot filter by {', '.join(sorted(unknown))}")
+            if filter.get('search') or filter.get('department') is not None:
+                ids = self.get_search_index().matching_ids(filter.get('search') or '', filter.get('department'))
+            predicate = salary_predicate(filter.get('min_salary'), filter.get('max_salary'))
+
+        if spec is None:
+            rows, size = storage_rows(self.storage, ids)
+        else:
+            reverse = all(descending for _, descending in spec)
+            order_spec = tuple((field, False) for field, _ in spec) if reverse else spec
+            cursor_key = decode_cursor(order_spec, cursor) if cursor else None
+            if ids is not None and len(ids) < self.storage.count() * SORT_MATCHES_SHARE:
+                rows, size = sorted_rows(self.storage, order_spec, ids, reverse, cursor_key)
+            else:
+                keys, order_ids = self.sort_index.get_order(order_spec, self.get_employees())
+                rows, size = ordered_rows(self.storage, keys, order_ids, reverse, cursor_key, ids)
+        return QueryResult(rows, size, predicate, offset, limit, spec)
+
+    # Get the employees in the given department. The name matches regardless of case, like everywhere a department
+    # is selected (the search index, query filters and the raise functions).
+
+    def get_employees_by_department(self, department):
+        return self.search_employees('', department)
+
+    # Get the department and salary of every employee as two sequences in the same order.
 
-    # Get the next available employee ID by finding the maximum ID in the list and adding 1.
-    # If the list is empty, return 1.
+    def get_salary_columns(self):
+        return self.storage.salary_columns()
+
+    # Get the history (see history.py) of the storage, or raise ValueError if the storage keeps none.
+
+    def get_history(self):
+        if self.storage.history is None:
+            raise ValueError("This storage does not keep a history of changes")
+        return self.storage.history
+
+    # Get all saved changes of an employee, oldest first, including the changes made before the employee was removed.
+    # Each change is a dictionary with the time (UTC), the kind of change (op) and the employee's values after it.
+
+    def get_employee_history(self, emp_id):
+        return self.get_history().employee_history(emp_id)
+
+    # Get an employee as they were at the given time, or None if they did not exist then.
+    # The time can be a datetime, a date (meaning the end of that day) or an ISO 8601 text.
+
+    def get_employee_as_of(self, emp_id, when):
+        return self.get_history().employee_as_of(emp_id, when)
+
+    # Get the salary of an employee at the given time, or None if they did not exist then.
+
+    def get_salary_as_of(self, emp_id, when):
+        emp = self.get_employee_as_of(emp_id, when)
+        return emp['salary'] if emp is not None else None
+
+    # Get all employees as they were at the given time.
+
+    def get_employees_as_of(self, when):
+        return self.get_history().employees_as_of(when)
+
+    # Get the next available employee ID from the storage.
 
     def get_next_employee_id(self):
-        if self.employee_list:
-            return max(emp['ID'] for emp in self.employee_list) + 1
-        return 1
\ No newline at end of file
+        return self.storage.next_id()
+
+    # Close the storage.
+
+    def close(self):
+        self.storage.close()
\ No newline at end of file
@@ -0,0 +1,95 @@
+# Advisory lock file shared by every process that works on the same employee data
+
+import threading # for serializing the threads of one process
+import time # for waiting between lock attempts on Windows
+
+# fcntl is only available on Unix and msvcrt only on Windows. If neither can be imported,
+# the lock still serializes the threads of this process but does not protect against other processes.
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+# FileLock class to hold an exclusive advisory lock on a file while the employee data is read or written.
+# The lock can be taken again by the thread that holds it, so nested saves do not deadlock.
+# Other processes that use the same lock file wait until it is released.
+
+class FileLock:
+
+    # Constructor to initialize the FileLock with the path of the lock file. The file is created when it is first locked.
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    # Take the lock. If blocking is False, return False instead of waiting when another thread or process holds it.
+
+    def acquire(self, blocking=True):
+        if not self.thread_lock.acquire(blocking):
+            return False
+        if self.depth == 0:
+            try:
+                self.file = open(self.path, 'a+')
+                if not self.lock_file(blocking):
+                    self.file.close()
+                    self.file = None
+                    self.thread_lock.release()
+                    return False
+            except BaseException:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return True
+
+    # Lock the open file with fcntl or msvcrt. Returns False if blocking is False and the file is already locked.
+
+    def lock_file(self, blocking):
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        elif msvcrt is not None:
+            while True:
+                try:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        return False
+                    time.sleep(0.01)
+        return True
+
+    # Release the lock once the outermost acquire() is matched.
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self.file.close()
+                self.file = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
\ No newline at end of file
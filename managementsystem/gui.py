@@ -3,7 +3,11 @@
 from tkinter import * # Import all tkinter classes and functions
 from tkinter import ttk, messagebox # Import ttk for themed widgets and messagebox for pop-up messages
 from employee_manager import EmployeeManager # Import EmployeeManager class for managing employee data
-from validators import validate_name, validate_department, validate_salary, validate_percent # Import validation functions for employee data
+from validators import validate_name, validate_department, validate_salary, validate_percent, validate_amount # Import validation functions for employee data
+from persistence_worker import PersistenceWorker # Import the background thread that saves changes to disk
+from background_loader import BackgroundLoader, PROGRESS, DONE # Import the background thread that loads the employees at startup
+from analytics import PayrollAnalytics # Import the payroll statistics for the Statistics tab
+from instrumentation import INSTRUMENTATION # Import the timing figures for the hidden diagnostics window
 
 # EmployeeGUI class to create the graphical user interface for the Employee Management System
 # This class handles the layout, widgets, and interactions for adding, viewing, editing, and removing employees.
@@ -15,29 +19,83 @@ class EmployeeGUI:
 
     COLUMNS = ('ID', 'Name', 'Department', 'Salary')
 
+    # Employee dictionary key shown in each treeview column.
+
+    COLUMN_KEYS = {'ID': 'ID', 'Name': 'name', 'Department': 'department', 'Salary': 'salary'}
+
+    # Define the columns for the treeview on the Statistics tab.
+
+    STATISTICS_COLUMNS = ('Department', 'Employees', 'Total', 'Average', 'Median', '90th Percentile')
+
+    # Number of rows added to the treeview at a time. More rows are added when the user scrolls near the end.
+
+    PAGE_SIZE = 200
+
+    # Interval in milliseconds for checking if the background saves have finished.
+
+    POLL_INTERVAL_MS = 100
+
+    # Interval in milliseconds for checking if another process changed the employee data.
+
+    RELOAD_INTERVAL_MS = 2000
+
+    # Delay in milliseconds after the last key press before search-as-you-type runs the search.
+
+    SEARCH_DELAY_MS = 250
+
     # Constructor to initialize the EmployeeGUI with a root window
     # This method sets up the main window, tabs, and widgets for adding and viewing employees.    
+    # An EmployeeManager with a different storage backend can be passed in; by default the JSON file is used.
+    # With load_in_background True the manager's employees are loaded on a background thread after the window is shown
+    # (see open_storage with load_now=False); the first page appears as soon as it is read and a progress bar shows the rest.
 
-    def __init__(self, root):
+    def __init__(self, root, manager=None, load_in_background=False):
         self.root = root
         self.root.title("Employee Management System")
         self.root.geometry('600x400')
 
-        self.manager = EmployeeManager()
+        self.manager = manager if manager is not None else EmployeeManager()
+        self.worker = PersistenceWorker(self.manager.storage)
 
         self.tab_control = ttk.Notebook(root)
         self.add_tab = ttk.Frame(self.tab_control)
         self.view_tab = ttk.Frame(self.tab_control)
+        self.statistics_tab = ttk.Frame(self.tab_control)
 
         self.tab_control.add(self.add_tab, text='Add Employee')
         self.tab_control.add(self.view_tab, text='View Employees')
+        self.tab_control.add(self.statistics_tab, text='Statistics')
 
+        self.analytics = PayrollAnalytics(self.manager)
         self.create_add_employee_widgets()
         self.create_view_employees_widgets()
+        self.create_statistics_widgets()
+        self.tab_control.bind('<<NotebookTabChanged>>', self.on_tab_changed)
 
+        self.status_label = ttk.Label(root, text="", anchor='w')
+        self.status_label.pack(side=BOTTOM, fill=X, padx=5)
+        self.progress_bar = ttk.Progressbar(root, mode='determinate', maximum=100)
         self.tab_control.pack(expand=1, fill='both')
-        self.refresh_employee_list()
-        self.sort_orders = {col: False for col in self.COLUMNS}
+        self.displayed = []
+        self.search_term = None
+        self.rendered = {}
+        self.rendered_order = []
+        self.sort_columns = []
+        self.click_state = 0
+        self.loader = None
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_persistence)
+        if load_in_background:
+            self.loader = BackgroundLoader(self.manager, self.PAGE_SIZE)
+            self.progress_bar.pack(side=BOTTOM, fill=X, padx=5)
+            self.status_label.config(text="Loading employees...")
+            self.root.after(self.POLL_INTERVAL_MS, self.poll_loading)
+        else:
+            self.refresh_employee_list()
+            self.manager.subscribe(self.on_employees_changed)
+            self.root.after(self.RELOAD_INTERVAL_MS, self.check_for_changes)
+        if INSTRUMENTATION.enabled:
+            self.root.bind('<Control-Shift-D>', self.open_diagnostics)
+            self.root.bind('<Control-D>', self.open_diagnostics)
 
     # Create widgets for adding an employee
     # This method creates labels, entry fields, and buttons for adding an employee.
@@ -63,7 +121,9 @@ class EmployeeGUI:
             self.tree.column(col, width=100)
 
         scrollbar = ttk.Scrollbar(self.view_tab, orient=VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        self.tree.configure(yscroll=lambda first, last: self.on_tree_scroll(scrollbar, first, last))
+        self.tree.bind('<Button-1>', self.remember_click_state, add='+')
+        self.page_job = None
 
         edit_button = ttk.Button(self.view_tab, text="Edit Selected", command=self.edit_employee)
         remove_button = ttk.Button(self.view_tab, text="Remove Selected", command=self.remove_employee)
@@ -72,6 +132,8 @@ class EmployeeGUI:
         search_frame.pack(pady=5)
         self.search_entry = ttk.Entry(search_frame)
         self.search_entry.pack(side=LEFT, padx=5)
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        self.search_job = None
         search_button = ttk.Button(search_frame, text="Search", command=self.search_employee)
         search_button.pack(side=LEFT)
 
@@ -79,7 +141,111 @@ class EmployeeGUI:
         scrollbar.pack(side=RIGHT, fill=Y)
         edit_button.pack(pady=5)
         remove_button.pack(pady=5)
-        ttk.Button(self.view_tab, text="Refresh List", command=self.refresh_employee_list).pack(pady=5)
+        ttk.Button(self.view_tab, text="Refresh List", command=self.show_all_employees).pack(pady=5)
+
+    # Create widgets for the payroll statistics
+    # This method creates a treeview with statistics per department, a total line, and fields for simulating a raise.
+
+    def create_statistics_widgets(self):
+        self.statistics_tree = ttk.Treeview(self.statistics_tab, columns=self.STATISTICS_COLUMNS, show='headings', height=8)
+        for col in self.STATISTICS_COLUMNS:
+            self.statistics_tree.heading(col, text=col)
+            self.statistics_tree.column(col, width=90, anchor='e' if col != 'Department' else 'w')
+        self.statistics_tree.pack(fill=BOTH, expand=1, padx=10, pady=(10, 5))
+
+        self.overall_label = ttk.Label(self.statistics_tab, text="")
+        self.overall_label.pack(pady=5)
+
+        simulate_frame = ttk.Frame(self.statistics_tab)
+        simulate_frame.pack(pady=5)
+        ttk.Label(simulate_frame, text="Department (empty = all):").grid(row=0, column=0, padx=5, sticky='e')
+        self.simulate_dept_entry = ttk.Entry(simulate_frame, width=15)
+        self.simulate_dept_entry.grid(row=0, column=1, padx=5)
+        ttk.Label(simulate_frame, text="Search (empty = all):").grid(row=1, column=0, padx=5, sticky='e')
+        self.simulate_search_entry = ttk.Entry(simulate_frame, width=15)
+        self.simulate_search_entry.grid(row=1, column=1, padx=5)
+        ttk.Label(simulate_frame, text="Raise (%):").grid(row=0, column=2, padx=5, sticky='e')
+        self.simulate_percent_entry = ttk.Entry(simulate_frame, width=8)
+        self.simulate_percent_entry.grid(row=0, column=3, padx=5)
+        ttk.Label(simulate_frame, text="Amount:").grid(row=1, column=2, padx=5, sticky='e')
+        self.simulate_amount_entry = ttk.Entry(simulate_frame, width=8)
+        self.simulate_amount_entry.grid(row=1, column=3, padx=5)
+        ttk.Button(simulate_frame, text="Simulate", command=self.simulate_raise).grid(row=0, column=4, padx=5)
+        ttk.Button(simulate_frame, text="Apply to Payroll", command=self.apply_raise).grid(row=1, column=4, padx=5)
+
+        self.simulate_label = ttk.Label(self.statistics_tab, text="")
+        self.simulate_label.pack(pady=5)
+
+    # Refresh the statistics when the Statistics tab is opened
+    # This method only recalculates the statistics when they are visible.
+
+    def on_tab_changed(self, event=None):
+        if self.tab_control.select() == str(self.statistics_tab):
+            self.refresh_statistics()
+
+    # Refresh the payroll statistics
+    # This method recalculates the statistics per department and for all employees.
+
+    def refresh_statistics(self):
+        if self.loader is not None:
+            return
+        self.statistics_tree.delete(*self.statistics_tree.get_children())
+        for row in self.analytics.department_summary():
+            self.statistics_tree.insert('', 'end', values=(row['department'], row['count'], row['total'],
+                                                           f"{row['average']:.2f}", f"{row['median']:.2f}", f"{row['p90']:.2f}"))
+        overall = self.analytics.overall_summary()
+        self.overall_label.config(text=f"All employees: {overall['count']}, total payroll {overall['total']}, "
+                                       f"average {overall['average']:.2f}, median {overall['median']:.2f}")
+
+    # Read the raise fields of the Statistics tab
+    # This method validates the fields and returns the percentage, the amount, the department (None for all)
+    # and the search term (None for all). Empty percentage and amount fields count as 0.
+
+    def get_raise_fields(self):
+        percent_text = self.simulate_percent_entry.get()
+        amount_text = self.simulate_amount_entry.get()
+        percent = validate_percent(percent_text) if percent_text else 0.0
+        amount = validate_amount(amount_text) if amount_text else 0
+        dept = self.simulate_dept_entry.get()
+        if dept:
+            validate_department(dept)
+        search = self.simulate_search_entry.get().strip()
+        return percent, amount, dept or None, search or None
+
+    # Simulate a raise
+    # This method shows how the payroll would change with the given raise, without changing any employee.
+
+    def simulate_raise(self):
+        if self.still_loading():
+            return
+        try:
+            percent, amount, dept, search = self.get_raise_fields()
+            result = self.analytics.simulate_raise(percent=percent, amount=amount, department=dept, search=search)
+            self.simulate_label.config(text=f"{result['affected']} employees affected: payroll {result['old_total']} -> "
+                                            f"{result['new_total']} ({result['difference']:+d})")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    # Apply a raise to every matching employee
+    # This method asks for confirmation, changes all matching salaries with one save and shows the payroll totals.
+
+    def apply_raise(self):
+        if self.still_loading():
+            return
+        try:
+            percent, amount, dept, search = self.get_raise_fields()
+            target = f"department {dept}" if dept else "all employees"
+            if search:
+                target += f" matching '{search}'"
+            if not messagebox.askyesno("Confirm Raise", f"Apply {percent}% and {amount:+d} to the salaries of {target}?"):
+                return
+            result = self.manager.adjust_salaries(percent=percent, amount=amount, department=dept, search=search)
+            self.save_in_background()
+            self.refresh_statistics()
+            self.simulate_label.config(text=f"{result['affected']} employees updated: payroll {result['old_total']} -> "
+                                            f"{result['new_total']} ({result['difference']:+d})")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
 
     # Create a label and entry field for adding an employee
     # This method creates a label and an entry field for the specified text and row.
@@ -91,19 +257,52 @@ class EmployeeGUI:
         return entry
 
     # Sort the treeview based on the selected column
-    # This method sorts the treeview items based on the selected column and toggles the sort order.
+    # This method sorts by the clicked column, or toggles its order if it is already the sort column.
+    # Shift-click adds the column as a secondary sort column (for example Department, then Salary) or toggles its order.
 
     def sort_treeview(self, col):
-        items = [(self.tree.set(item, col), item) for item in self.tree.get_children('')]
-        items.sort(key=lambda x: int(x[0]) if col in ('ID', 'Salary') else x[0].lower(), reverse=self.sort_orders[col])
-        for index, (val, item) in enumerate(items):
-            self.tree.move(item, '', index)
-        self.sort_orders[col] = not self.sort_orders[col]
+        columns = [c for c, _ in self.sort_columns]
+        if self.click_state & 0x0001 and col in columns:
+            index = columns.index(col)
+            self.sort_columns[index] = (col, not self.sort_columns[index][1])
+        elif self.click_state & 0x0001:
+            self.sort_columns.append((col, False))
+        elif columns == [col]:
+            self.sort_columns = [(col, not self.sort_columns[0][1])]
+        else:
+            self.sort_columns = [(col, False)]
+        self.update_headings()
+        self.refresh_employee_list()
+
+    # Remember the modifier keys of the last mouse click, so a heading click can tell if Shift was held.
+
+    def remember_click_state(self, event):
+        self.click_state = event.state
+
+    # Query the employees to display: the matches of the current search, in the selected sort order.
+    # The result is lazy, so only the rows of the pages that are shown are read.
+
+    def query_employees(self):
+        order_by = [('-' if descending else '') + self.COLUMN_KEYS[col] for col, descending in self.sort_columns]
+        filter = {'search': self.search_term} if self.search_term is not None else None
+        return self.manager.query(filter=filter, order_by=order_by or None)
+
+    # Show the sort direction in the column headings.
+
+    def update_headings(self):
+        directions = dict(self.sort_columns)
+        for col in self.COLUMNS:
+            if col in directions:
+                self.tree.heading(col, text=col + (' ▼' if directions[col] else ' ▲'))
+            else:
+                self.tree.heading(col, text=col)
 
     # Add a new employee to the list
     # This method retrieves the data from the entry fields, validates it, and adds the employee to the list.
 
     def add_employee(self):
+        if self.still_loading():
+            return
         try:
             name = self.name_entry.get()
             dept = self.dept_entry.get()
@@ -112,9 +311,9 @@ class EmployeeGUI:
             validate_department(dept)
 
             emp = self.manager.add_employee(name, dept, salary)
+            self.save_in_background()
             messagebox.showinfo("Success", f"Employee added with ID: {emp['ID']}")
             self.clear_entries()
-            self.refresh_employee_list()
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
@@ -122,6 +321,8 @@ class EmployeeGUI:
     # This method opens a new window to edit the selected employee's information and warns if no employee is selected.
 
     def edit_employee(self):
+        if self.still_loading():
+            return
         selected_item = self.tree.selection()
         if not selected_item:
             messagebox.showwarning("Warning", "Please select an employee to edit")
@@ -163,7 +364,7 @@ class EmployeeGUI:
                 validate_department(dept)
 
                 self.manager.update_employee(emp_id, name, dept, salary)
-                self.refresh_employee_list()
+                self.save_in_background()
                 edit_window.destroy()
                 messagebox.showinfo("Success", "Employee updated successfully")
             except ValueError as e:
@@ -185,6 +386,8 @@ class EmployeeGUI:
     # This method removes the selected employee from the list and updates the treeview.
 
     def remove_employee(self):
+        if self.still_loading():
+            return
         selected_item = self.tree.selection()
         if not selected_item:
             messagebox.showwarning("Warning", "Please select an employee to remove")
@@ -196,30 +399,118 @@ class EmployeeGUI:
         confirm = messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove employee ID {emp_id}?")
         if confirm:
             self.manager.remove_employee(emp_id)
-            self.refresh_employee_list()
+            self.save_in_background()
             messagebox.showinfo("Success", f"Employee ID {emp_id} removed successfully")
 
     # Search for employees based on name or department
-    # This method filters the employee list based on the search term and updates the treeview.
+    # This method filters the employee list with the manager's search index and updates the treeview.
+    # The pop-up message is only shown when the search is started with the Search button.
 
-    def search_employee(self):
-        search_term = self.search_entry.get().lower()
-        filtered = [emp for emp in self.manager.get_employees() if search_term in emp['name'].lower() or search_term in emp['department'].lower()]
-        if not filtered:
+    def search_employee(self, show_message=True):
+        self.search_job = None
+        self.search_term = self.search_entry.get().lower()
+        self.refresh_employee_list()
+        if self.loader is None and not len(self.displayed) and show_message:
             messagebox.showinfo("Info", "No employees match your search.")
-        self.refresh_employee_list(filtered)
+
+    # Schedule a search while the user is typing
+    # This method restarts the timer on every key press, so the search only runs once typing pauses.
+
+    def schedule_search(self, event=None):
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(self.SEARCH_DELAY_MS, lambda: self.search_employee(show_message=False))
+
+    # Show the full employee list again
+    # This method clears the search, so the Refresh List button always brings back every employee, as it used to.
+
+    def show_all_employees(self):
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        self.search_entry.delete(0, END)
+        self.search_term = ''
+        self.refresh_employee_list()
 
     # Refresh the employee list in the treeview
-    # This method clears the treeview and repopulates it with the current employee list.
+    # This method shows the employees matching the current search, or all employees, in the current sort order.
+    # Only the rows up to the current page are read and created, and rows that did not change are left alone.
+    # While the employees are still loading nothing is changed; the list is refreshed once loading has finished.
+
+    def refresh_employee_list(self):
+        if self.loader is not None:
+            return
+        self.displayed = self.query_employees()
+        self.render_rows()
 
-    def refresh_employee_list(self, employee_list=None):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    # Update the treeview after employees were changed
+    # The manager calls this method with the changes (see EmployeeManager.subscribe), once for a whole batch.
+    # Changes that only alter the values of rows leave the order and the matches of the search as they were, so just the
+    # rows that are shown are updated. Added or removed employees, or changes to searched or sorted fields, query the list again.
 
-        if employee_list is None:
-            employee_list = self.manager.employee_list
-        for emp in employee_list:
-            self.tree.insert('', 'end', values=(emp['ID'], emp['name'], emp['department'], emp['salary']))
+    def on_employees_changed(self, changes):
+        if changes is None or any(kind != 'updated' or self.moves_row(old, new) for kind, old, new in changes):
+            self.refresh_employee_list()
+            return
+        for _, _, emp in changes:
+            iid = str(emp['ID'])
+            values = (emp['ID'], emp['name'], emp['department'], emp['salary'])
+            if iid in self.rendered and self.rendered[iid] != values:
+                self.tree.item(iid, values=values)
+                self.rendered[iid] = values
+
+    # Check if a change to an employee can move it in the list or in or out of the search results.
+
+    def moves_row(self, old, new):
+        fields = [self.COLUMN_KEYS[col] for col, _ in self.sort_columns]
+        if self.search_term:
+            fields += ['name', 'department']
+        return any(old[field] != new[field] for field in fields)
+
+    # Bring the treeview in line with the first pages of the displayed employees
+    # This method deletes rows that are gone, updates changed rows, inserts new rows and moves rows only where the order differs.
+    # Each row uses the employee ID as its item ID, so unchanged rows are recognized without reading them back from the widget.
+
+    def render_rows(self, row_count=None):
+        if row_count is None:
+            row_count = max(len(self.rendered_order), self.PAGE_SIZE)
+        visible = self.displayed[:row_count]
+        new_order = [str(emp['ID']) for emp in visible]
+
+        stale = set(self.rendered) - set(new_order)
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.rendered[iid]
+        order = [iid for iid in self.rendered_order if iid not in stale]
+
+        for iid, emp in zip(new_order, visible):
+            values = (emp['ID'], emp['name'], emp['department'], emp['salary'])
+            old_values = self.rendered.get(iid)
+            if old_values is None:
+                self.tree.insert('', 'end', iid=iid, values=values)
+                order.append(iid)
+            elif old_values != values:
+                self.tree.item(iid, values=values)
+            self.rendered[iid] = values
+
+        if order != new_order:
+            self.tree.set_children('', *new_order)
+        self.rendered_order = new_order
+
+    # Update the scrollbar and add the next page of rows when the user scrolls near the end of the treeview
+    # The rows are added after Tk has finished the scroll, so the scroll callback is not re-entered.
+
+    def on_tree_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        if float(last) > 0.9 and len(self.rendered_order) < len(self.displayed) and self.page_job is None:
+            self.page_job = self.root.after_idle(self.load_next_page)
+
+    # Add the next page of rows to the treeview.
+
+    def load_next_page(self):
+        self.page_job = None
+        self.render_rows(len(self.rendered_order) + self.PAGE_SIZE)
 
     # Clear the entry fields after adding an employee
     # This method clears the entry fields for name, department, and salary.
@@ -229,9 +520,94 @@ class EmployeeGUI:
         self.dept_entry.delete(0, END)
         self.salary_entry.delete(0, END)
 
+    # Save changes without blocking the window
+    # This method asks the background worker to write the changes and shows that saving is in progress.
+
+    def save_in_background(self):
+        self.worker.request_save()
+        self.status_label.config(text="Saving...")
+
+    # Check the results of the background saves
+    # This method runs every POLL_INTERVAL_MS on the Tk thread and reports finished or failed saves.
+
+    def poll_persistence(self):
+        for error in self.worker.poll_results():
+            if error is None:
+                self.status_label.config(text="All changes saved")
+            else:
+                self.status_label.config(text="Saving failed")
+                messagebox.showerror("Error", f"Could not save changes: {error}")
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_persistence)
+
+    # Check the progress of the background loading
+    # This method runs every POLL_INTERVAL_MS on the Tk thread until the employees are loaded. It shows the first
+    # page as soon as it has been read, then the full list in the current search and sort order once loading is done.
+    # If loading fails the window is closed, as starting without the employees would save an empty list over them.
+
+    def poll_loading(self):
+        for kind, value in self.loader.poll_results():
+            if kind == PROGRESS:
+                loaded, fraction, preview = value
+                self.progress_bar['value'] = fraction * 100
+                self.status_label.config(text=f"Loading employees... {loaded} read ({fraction:.0%})")
+                if preview:
+                    self.displayed = self.displayed + preview
+                    self.render_rows()
+            elif kind == DONE:
+                self.loader = None
+                self.progress_bar.pack_forget()
+                self.status_label.config(text=f"Loaded {self.manager.storage.count()} employees")
+                self.refresh_employee_list()
+                self.on_tab_changed()
+                self.manager.subscribe(self.on_employees_changed)
+                self.root.after(self.RELOAD_INTERVAL_MS, self.check_for_changes)
+                return
+            else:
+                messagebox.showerror("Error", f"Could not load employees: {value}")
+                self.root.destroy()
+                return
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_loading)
+
+    # Check if the employees are still being loaded, and if so ask the user to wait.
+
+    def still_loading(self):
+        if self.loader is not None:
+            self.status_label.config(text="Please wait until the employees are loaded")
+            return True
+        return False
+
+    # Check if another process changed the employee data
+    # This method runs every RELOAD_INTERVAL_MS on the Tk thread. Only the changed employees are merged, and the
+    # check is skipped while another process holds the data files, so the window never waits for it.
+
+    def check_for_changes(self):
+        try:
+            changes = self.manager.reload_if_changed(blocking=False)
+        except OSError as e:
+            changes = []
+            self.status_label.config(text=f"Could not check for changes: {e}")
+        if changes is None or changes:
+            self.status_label.config(text="Updated with changes from another window")
+        self.root.after(self.RELOAD_INTERVAL_MS, self.check_for_changes)
+
+    # Open the hidden diagnostics window with the timing figures
+    # This method is bound to Ctrl+Shift+D only when the program runs with --instrument.
+
+    def open_diagnostics(self, event=None):
+        from diagnostics_window import DiagnosticsWindow
+        DiagnosticsWindow(self.root)
+
     # Close the application with a confirmation dialog
-    # This method prompts the user to confirm before closing the application.
+    # This method prompts the user to confirm before closing the application, waits for the pending saves
+    # and writes the journaled changes into the JSON file. If the employees are still loading, nothing can have
+    # changed yet and nothing is written.
 
     def on_closing(self):
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
+            if self.loader is None:
+                self.worker.stop()
+                self.manager.compact()
+                self.manager.close()
+            if INSTRUMENTATION.enabled:
+                INSTRUMENTATION.write_summary()
             self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,373 @@
+# Append-only change history for employee data
+
+import json # for encoding history records
+import os # for file sizes, links and the checkpoint directory
+import re # for reading the time and ID of a record without decoding it
+import shutil # for copying snapshots where links are not supported
+from bisect import bisect_right # for finding the record in effect at a given time
+from datetime import datetime, timezone # for time stamps
+from json.encoder import encode_basestring_ascii # for encoding text fields exactly like json.dumps
+from binary_snapshot import read_snapshot # for reading checkpoints
+
+# Format of the time stamps in the history: UTC with microseconds. All stamps have the same length,
+# so they can be compared as text.
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+# Format of the time stamps in checkpoint file names, which cannot contain colons on every platform.
+
+CHECKPOINT_TIME_FORMAT = '%Y%m%dT%H%M%S.%fZ'
+
+# Smallest number of bytes appended to the history after the last checkpoint before a new checkpoint is kept.
+# A new checkpoint is also never kept before the history has grown by the size of the previous one,
+# so checkpoints of a large roster are kept less often and never take more room than the history itself.
+
+CHECKPOINT_MIN_BYTES = 1024 * 1024
+
+# Get the current time as a history time stamp.
+
+def now():
+    return datetime.now(timezone.utc).strftime(TIME_FORMAT)
+
+# Convert a point in time to a history time stamp.
+# Accepts a datetime, a date or an ISO 8601 text such as "2024-05-31" or "2024-05-31T12:00:00".
+# Times without a time zone are local times. A date without a time means the end of that day,
+# so "as of 2024-05-31" includes the changes made on that day.
+
+def history_time(when):
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when) if len(when) > 10 else datetime.fromisoformat(when).date()
+    if not isinstance(when, datetime):
+        when = datetime.combine(when, datetime.max.time())
+    if when.tzinfo is None:
+        when = when.astimezone()
+    return when.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+# Build the history record of a journal entry (see journal.py) with the time it was saved.
+# Records are flat: {"time", "op", "ID", "name", "department", "salary"}, and a removal has only the time, op and ID.
+
+def history_record(entry, time):
+    op = entry['op']
+    if op == 'add':
+        emp = entry['employee']
+        return {"time": time, "op": op, "ID": emp['ID'], "name": emp['name'], "department": emp['department'], "salary": emp['salary']}
+    if op == 'update':
+        return {"time": time, "op": op, "ID": entry['ID'], "name": entry['name'], "department": entry['department'], "salary": entry['salary']}
+    return {"time": time, "op": op, "ID": entry['ID']}
+
+# Layout of a history record of an added or updated employee, as written by json.dumps.
+
+RECORD_TEMPLATE = '{"time": "%s", "op": "%s", "ID": %d, "name": %s, "department": %s, "salary": %d}'
+
+# Start of a line written with RECORD_TEMPLATE (or json.dumps of a removal), with the time and the ID.
+
+RECORD_PREFIX = re.compile(rb'\{"time": "([^"\\]*)", "op": "[a-z]+", "ID": (-?\d+)[,}]')
+
+# Encode a history record on one line, the same as json.dumps.
+# Records with the usual fields and plain text and integer values are filled into RECORD_TEMPLATE, which is much faster.
+
+def encode_record(record):
+    if len(record) == 6:
+        emp_id, name, department, salary = record['ID'], record['name'], record['department'], record['salary']
+        if type(name) is str and type(department) is str and type(emp_id) is int and type(salary) is int:
+            return RECORD_TEMPLATE % (record['time'], record['op'], emp_id, encode_basestring_ascii(name),
+                                      encode_basestring_ascii(department), salary)
+    return json.dumps(record)
+
+# Get the employee described by a history record, or None if the record removes the employee.
+
+def record_employee(record):
+    if record['op'] == 'remove':
+        return None
+    return {"name": record['name'], "ID": record['ID'], "department": record['department'], "salary": record['salary']}
+
+# This class keeps the history of every saved change to the employee data in a JSON Lines file next to employees.json.
+# Records are only ever appended, each with the time it was saved, so the file is an audit log of all changes
+# and the main file is not rewritten more often than before.
+# The history starts with a "baseline" record for every employee that existed when it was created.
+# Checkpoints (the whole roster at one point of the history) are kept in a directory next to the history, so the
+# roster as of a date is rebuilt from the nearest earlier checkpoint instead of replaying the whole history.
+# A checkpoint is a snapshot the storage has just written anyway, linked into the directory, so it costs no extra write.
+# For single employees an index from ID to the positions of their records is built the first time it is needed
+# and then kept up to date by reading only the new records.
+# Appends must be made under the file lock of the storage, so several processes can share the history.
+
+class History:
+
+    # Constructor to initialize the History with the path of the history file.
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint_dir = os.path.splitext(path)[0] + '.checkpoints'
+        self.index = {}
+        self.index_offset = 0
+
+    # Start the history with a baseline record for each employee if the history file does not exist yet.
+
+    def start(self, employees):
+        if os.path.exists(self.path) or not len(employees):
+            return
+        time = now()
+        self.write_records({"time": time, "op": "baseline", "ID": emp['ID'], "name": emp['name'],
+                            "department": emp['department'], "salary": emp['salary']} for emp in employees)
+
+    # Append journal entries with the current time. Returns the time stamp, or None if there was nothing to append.
+
+    def append(self, entries):
+        if not entries:
+            return None
+        time = now()
+        self.write_records(history_record(entry, time) for entry in entries)
+        return time
+
+    # Append records with a single write and flush them to disk.
+    # A half-written last line left by a crash is ended first, so it cannot swallow the first new record.
+
+    def write_records(self, records):
+        data = ''.join(encode_record(record) + '\n' for record in records).encode('utf-8')
+        with open(self.path, 'ab+') as file:
+            end = file.seek(0, os.SEEK_END)
+            if end > 0:
+                file.seek(end - 1)
+                if file.read(1) != b'\n':
+                    data = b'\n' + data
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    # Read the history records from the given byte offset to the end of the file.
+    # Yields (offset, record) pairs. Broken lines and a half-written last line are skipped.
+
+    def read_records(self, start=0):
+        try:
+            with open(self.path, 'rb') as file:
+                file.seek(start)
+                offset = start
+                for line in file:
+                    line_offset = offset
+                    offset += len(line)
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        yield line_offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    # Get the checkpoints as (history offset, time stamp, path) tuples, oldest first.
+    # The offset and time are part of the file name, so no checkpoint has to be opened to choose one.
+
+    def checkpoints(self):
+        try:
+            names = os.listdir(self.checkpoint_dir)
+        except FileNotFoundError:
+            return []
+        checkpoints = []
+        for name in names:
+            stem, extension = os.path.splitext(name)
+            offset, _, time = stem.partition('_')
+            if extension in ('.json', '.jsonl', '.bin') and offset.isdigit():
+                try:
+                    time = datetime.strptime(time, CHECKPOINT_TIME_FORMAT).strftime(TIME_FORMAT)
+                except ValueError:
+                    continue
+                checkpoints.append((int(offset), time, os.path.join(self.checkpoint_dir, name)))
+        return sorted(checkpoints)
+
+    # Keep a snapshot file as a checkpoint at the current end of the history, if enough has been appended since
+    # the last checkpoint. Must be called under the file lock right after the snapshot was written and the
+    # changes in it were appended at the given time, so the snapshot holds exactly the roster at the end of the history.
+    # The snapshot is hard linked into the checkpoint directory, or copied where links are not supported.
+
+    def add_checkpoint(self, snapshot_path, time):
+        end = os.path.getsize(self.path)
+        checkpoints = self.checkpoints()
+        offset, size = (checkpoints[-1][0], os.path.getsize(checkpoints[-1][2])) if checkpoints else (0, 0)
+        if end - offset < max(CHECKPOINT_MIN_BYTES, size):
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        name = f"{end:015d}_{datetime.strptime(time, TIME_FORMAT).strftime(CHECKPOINT_TIME_FORMAT)}"
+        path = os.path.join(self.checkpoint_dir, name + os.path.splitext(snapshot_path)[1])
+        try:
+            os.link(snapshot_path, path)
+        except OSError:
+            shutil.copyfile(snapshot_path, path + '.tmp')
+            os.replace(path + '.tmp', path)
+
+    # Load a checkpoint as a dictionary from ID to employee.
+
+    def load_checkpoint(self, checkpoint):
+        return {emp['ID']: emp for emp in read_snapshot(checkpoint[2])}
+
+    # Load the newest readable checkpoint at or before the given time stamp.
+    # Returns the roster and the history offset it was taken at; without a checkpoint the roster is empty and the offset is 0.
+
+    def load_checkpoint_before(self, time):
+        for checkpoint in reversed(self.checkpoints()):
+            if checkpoint[1] <= time:
+                try:
+                    return self.load_checkpoint(checkpoint), checkpoint[0]
+                except (OSError, KeyError, TypeError, ValueError):
+                    continue
+        return {}, 0
+
+    # Get all employees as they were at the given time (see history_time), in the order they were added.
+    # Starts from the newest checkpoint taken before that time and replays only the records after it.
+
+    def employees_as_of(self, when):
+        time = history_time(when)
+        roster, start = self.load_checkpoint_before(time)
+        for _, record in self.read_records(start):
+            if record['time'] > time:
+                break
+            apply_record(roster, record)
+        return list(roster.values())
+
+    # Read the records added to the history since the index was last updated into the index.
+    # Only the time and ID at the start of each line are read, so the records do not have to be decoded.
+    # If the history was replaced by a shorter file, the index is built again from the start.
+
+    def update_index(self):
+        try:
+            with open(self.path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < self.index_offset:
+                    self.index = {}
+                    self.index_offset = 0
+                file.seek(self.index_offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    offset = self.index_offset
+                    self.index_offset += len(line)
+                    match = RECORD_PREFIX.match(line)
+                    if match is not None:
+                        emp_id, time = int(match.group(2)), match.group(1).decode('ascii')
+                    else:
+                        try:
+                            record = json.loads(line)
+                            emp_id, time = record['ID'], record['time']
+                        except (json.JSONDecodeError, KeyError, TypeError):
+                            continue
+                    self.index.setdefault(emp_id, []).append((time, offset))
+        except FileNotFoundError:
+            self.index = {}
+            self.index_offset = 0
+
+    # Read the records at the given byte offsets of the history.
+
+    def read_at(self, offsets):
+        records = []
+        with open(self.path, 'rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                records.append(json.loads(file.readline()))
+        return records
+
+    # Get all history records of an employee, oldest first.
+
+    def employee_history(self, emp_id):
+        self.update_index()
+        return self.read_at(offset for _, offset in self.index.get(emp_id, []))
+
+    # Get an employee as they were at the given time (see history_time), or None if they did not exist then.
+
+    def employee_as_of(self, emp_id, when):
+        self.update_index()
+        positions = self.index.get(emp_id, [])
+        i = bisect_right(positions, (history_time(when), float('inf')))
+        if i == 0:
+            return None
+        return record_employee(self.read_at([positions[i - 1][1]])[0])
+
+
+# Time stamp of the current time in SQL, in the format of TIME_FORMAT. SQLite only keeps milliseconds,
+# so the stamps are padded to microseconds and still compare as text with the stamps of history_time.
+
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now') || '000Z'"
+
+# SQL statements that keep the history of an SQLite database (see SQLiteStorage).
+# Triggers on the employees table append a record for every inserted, updated and deleted row, in the same
+# transaction as the change, so a rolled back transaction leaves no records and other programs writing to the
+# database are recorded too. The history starts with a baseline record for every employee already in the database.
+
+SQLITE_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS history (
+        seq INTEGER PRIMARY KEY,
+        time TEXT NOT NULL,
+        op TEXT NOT NULL,
+        ID INTEGER NOT NULL,
+        name TEXT,
+        department TEXT,
+        salary INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS history_employee ON history (ID, time);
+    CREATE INDEX IF NOT EXISTS history_time ON history (time);
+    INSERT INTO history (time, op, ID, name, department, salary)
+        SELECT {SQL_NOW}, 'baseline', ID, name, department, salary FROM employees
+        WHERE NOT EXISTS (SELECT 1 FROM history) ORDER BY ID;
+    CREATE TRIGGER IF NOT EXISTS history_add AFTER INSERT ON employees BEGIN
+        INSERT INTO history (time, op, ID, name, department, salary)
+            VALUES ({SQL_NOW}, 'add', NEW.ID, NEW.name, NEW.department, NEW.salary);
+    END;
+    CREATE TRIGGER IF NOT EXISTS history_update AFTER UPDATE ON employees BEGIN
+        INSERT INTO history (time, op, ID, name, department, salary)
+            VALUES ({SQL_NOW}, 'update', NEW.ID, NEW.name, NEW.department, NEW.salary);
+    END;
+    CREATE TRIGGER IF NOT EXISTS history_remove AFTER DELETE ON employees BEGIN
+        INSERT INTO history (time, op, ID) VALUES ({SQL_NOW}, 'remove', OLD.ID);
+    END;
+"""
+
+# This class reads the history kept in an SQLite database by the triggers of SQLITE_SCHEMA.
+# It answers the same questions as History, with the same records, so EmployeeManager and the API
+# do not need to know which backend they use. The indexes on ID and time keep every query from reading the whole table.
+
+class SQLiteHistory:
+
+    # Constructor to initialize the SQLiteHistory with the database connection of the storage.
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    # Convert a history row to a record like the ones History reads from its file.
+
+    @staticmethod
+    def to_record(row):
+        if row['op'] == 'remove':
+            return {"time": row['time'], "op": row['op'], "ID": row['ID']}
+        return {"time": row['time'], "op": row['op'], "ID": row['ID'], "name": row['name'],
+                "department": row['department'], "salary": row['salary']}
+
+    # Get all employees as they were at the given time (see history_time), in the order they were added.
+
+    def employees_as_of(self, when):
+        rows = self.connection.execute("""
+            SELECT history.* FROM history
+            JOIN (SELECT MAX(seq) AS last, MIN(seq) AS first FROM history WHERE time <= ? GROUP BY ID) AS latest
+            ON history.seq = latest.last
+            WHERE history.op != 'remove' ORDER BY latest.first
+        """, (history_time(when),))
+        return [record_employee(self.to_record(row)) for row in rows]
+
+    # Get all history records of an employee, oldest first.
+
+    def employee_history(self, emp_id):
+        rows = self.connection.execute("SELECT * FROM history WHERE ID = ? ORDER BY seq", (emp_id,))
+        return [self.to_record(row) for row in rows]
+
+    # Get an employee as they were at the given time (see history_time), or None if they did not exist then.
+
+    def employee_as_of(self, emp_id, when):
+        row = self.connection.execute("SELECT * FROM history WHERE ID = ? AND time <= ? ORDER BY time DESC, seq DESC LIMIT 1",
+                                      (emp_id, history_time(when))).fetchone()
+        return record_employee(self.to_record(row)) if row else None
+
+# Apply a history record to a roster, which is a dictionary from ID to employee.
+
+def apply_record(roster, record):
+    emp = record_employee(record)
+    if emp is None:
+        roster.pop(record['ID'], None)
+    else:
+        roster[record['ID']] = emp
\ No newline at end of file
@@ -0,0 +1,249 @@
+# Timing instrumentation for the Employee Management System
+
+import functools # for keeping the names of wrapped functions
+import json # for the structured log
+import os # for the profile file paths
+import sys # for finding modules that imported a wrapped function
+import threading # for guarding the figures, which the save thread also updates
+import time # for measuring calls
+from bisect import bisect_left # for finding the histogram bucket of a call
+
+# Upper bounds of the latency histogram buckets in milliseconds. The last bucket takes everything slower.
+
+BUCKETS_MS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, float('inf'))
+
+# Calls slower than this many milliseconds are written to the log one by one.
+
+SLOW_CALL_MS = 100
+
+# Methods and functions that are timed when instrumentation is enabled.
+
+MANAGER_METHODS = ('load_employees', 'save_employees', 'compact', 'add_employee', 'remove_employee', 'update_employee',
+                   'add_employees', 'update_many', 'adjust_salaries', 'get_employee', 'get_employees', 'get_search_index',
+                   'search_employees', 'get_sorted_employees', 'query', 'get_employees_by_department', 'get_salary_columns',
+                   'get_next_employee_id', 'reload_if_changed')
+STORAGE_METHODS = ('load', 'save', 'flush', 'write_snapshot', 'merge_from_disk')
+JOURNAL_METHODS = ('append_many', 'replay', 'read_new')
+GUI_METHODS = ('refresh_employee_list', 'render_rows', 'query_employees', 'sort_treeview', 'search_employee',
+               'load_next_page', 'add_employee', 'edit_employee', 'remove_employee', 'refresh_statistics',
+               'simulate_raise', 'apply_raise', 'poll_loading', 'check_for_changes', 'on_employees_changed',
+               'show_all_employees')
+
+# GUI methods run by Tk timers rather than by the user. They are timed, but never chosen as the next action to profile.
+
+TIMER_METHODS = ('poll_loading', 'check_for_changes')
+
+# Metric class to count the calls of one function and sort their latencies into the histogram buckets.
+
+class Metric:
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    # Add one call that took the given number of seconds.
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+    # Estimate a percentile in milliseconds from the histogram: the upper bound of the bucket it falls in,
+    # or the slowest call for the last bucket.
+
+    def percentile(self, q):
+        target = self.count * q / 100
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    # Get the figures as a dictionary for the log and the diagnostics window.
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "calls": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 4),
+            "p95_ms": round(self.percentile(95), 4),
+            "max_ms": round(self.max * 1000, 4),
+            "histogram": {str(bound): count for bound, count in zip(BUCKETS_MS, self.buckets) if count}
+        }
+
+# Instrumentation class to wrap functions with timers and collect their figures.
+# Nothing is wrapped until enable() is called, so the program runs its original functions at full speed
+# when instrumentation is off. disable() puts the original functions back.
+
+class Instrumentation:
+
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.wrapped = []
+        self.log_path = None
+        self.slow_call_ms = SLOW_CALL_MS
+        self.local = threading.local()
+        self.profile_target = None
+        self.last_profile = None
+
+    # Wrap the manager, storage, journal, validators and (if gui is True) the GUI handlers with timers.
+    # Figures and slow calls are written to log_path as JSON lines if it is given.
+    # Must be called before the GUI is created, because Tk keeps the handlers it was given.
+
+    def enable(self, log_path=None, gui=True, slow_call_ms=SLOW_CALL_MS):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.log_path = log_path
+        self.slow_call_ms = slow_call_ms
+        import employee_manager, storage, journal, validators
+        self.wrap_methods(employee_manager.EmployeeManager, MANAGER_METHODS)
+        self.wrap_methods(storage.JSONStorage, STORAGE_METHODS)
+        self.wrap_methods(journal.Journal, JOURNAL_METHODS)
+        for name in dir(validators):
+            if name.startswith('validate_'):
+                self.wrap_function(validators, name)
+        if gui:
+            import gui as gui_module
+            self.wrap_methods(gui_module.EmployeeGUI, GUI_METHODS)
+        self.log({"event": "enabled"})
+
+    # Put all original functions back and stop collecting figures.
+
+    def disable(self):
+        for owner, name, original in reversed(self.wrapped):
+            setattr(owner, name, original)
+        self.wrapped = []
+        self.enabled = False
+
+    # Wrap the given methods of a class. The figures are named "Class.method".
+
+    def wrap_methods(self, cls, names):
+        for name in names:
+            original = cls.__dict__.get(name)
+            if original is not None:
+                self.wrapped.append((cls, name, original))
+                setattr(cls, name, self.timed(f"{cls.__name__}.{name}", original))
+
+    # Wrap a module-level function, also in every loaded module that imported it with "from module import name".
+
+    def wrap_function(self, module, name):
+        original = getattr(module, name)
+        wrapper = self.timed(f"{module.__name__}.{name}", original)
+        for other in list(sys.modules.values()):
+            if getattr(other, name, None) is original:
+                self.wrapped.append((other, name, original))
+                setattr(other, name, wrapper)
+
+    # Build a wrapper that times every call of a function.
+    # If profile_next() asked for it, the call is run under cProfile instead.
+
+    def timed(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            depth = getattr(self.local, 'depth', 0)
+            if self.profile_target is not None and self.should_profile(name, depth):
+                return self.run_profiled(name, func, args, kwargs)
+            self.local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+                self.local.depth = depth
+        return wrapper
+
+    # Add a call to the figures of a function and log it if it was slow.
+
+    def record(self, name, seconds):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = Metric(name)
+            metric.add(seconds)
+        if seconds * 1000 >= self.slow_call_ms:
+            self.log({"event": "slow_call", "name": name, "ms": round(seconds * 1000, 3)})
+
+    # Get the figures of every timed function, slowest total first.
+
+    def summary(self):
+        with self.lock:
+            metrics = [metric.summary() for metric in self.metrics.values()]
+        return sorted(metrics, key=lambda metric: metric["total_ms"], reverse=True)
+
+    # Forget all figures collected so far.
+
+    def reset(self):
+        with self.lock:
+            self.metrics = {}
+
+    # Append an event to the log file as one JSON line with a time stamp. Does nothing without a log file.
+
+    def log(self, event):
+        if self.log_path is None:
+            return
+        event = dict(event, time=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        with self.lock:
+            with open(self.log_path, 'a') as file:
+                file.write(json.dumps(event) + '\n')
+
+    # Write the current figures of every timed function to the log.
+
+    def write_summary(self):
+        self.log({"event": "summary", "metrics": self.summary()})
+
+    # Profile the next call of the named function with cProfile, or the next top-level action if name is None
+    # (for example the next button click or sort, including everything it calls).
+
+    def profile_next(self, name=None):
+        self.profile_target = name or ''
+
+    # Check if a call should be the profiled one.
+    # The next action is the next top-level call on the main thread that the user started: timer callbacks and
+    # the calls of background threads (saving, loading) are skipped, so they do not take the place of a click.
+
+    def should_profile(self, name, depth):
+        if self.profile_target == name:
+            return True
+        return (self.profile_target == '' and depth == 0 and threading.current_thread() is threading.main_thread()
+                and name.split('.')[-1] not in TIMER_METHODS)
+
+    # Run one call under cProfile. The statistics are kept in last_profile, written to a .prof file next to
+    # the log (which can be opened with pstats or snakeviz) and summarized in the log.
+
+    def run_profiled(self, name, func, args, kwargs):
+        import cProfile, io, pstats # imported here, because profiling is rare and pstats is slow to import
+        self.profile_target = None
+        profiler = cProfile.Profile()
+        self.local.depth = getattr(self.local, 'depth', 0) + 1
+        start = time.perf_counter()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            self.local.depth -= 1
+            self.record(name, seconds)
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(25)
+            self.last_profile = f"{name}: {seconds * 1000:.1f} ms\n{text.getvalue()}"
+            event = {"event": "profile", "name": name, "ms": round(seconds * 1000, 3), "stats": text.getvalue()}
+            if self.log_path is not None:
+                path = os.path.join(os.path.dirname(os.path.abspath(self.log_path)),
+                                    f"profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+                profiler.dump_stats(path)
+                event["file"] = path
+            self.log(event)
+
+
+# The instrumentation shared by the whole program.
+
+INSTRUMENTATION = Instrumentation()
\ No newline at end of file
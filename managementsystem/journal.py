@@ -0,0 +1,137 @@
+# Append-only journal for employee changes
+
+import json # for encoding journal entries
+import os # for file existence check
+
+# This class appends every change to the employee data as one JSON line in a log file next to employees.json.
+# Replaying the log on top of the last snapshot gives the current state without rewriting the whole file on every change.
+# The journal remembers how many bytes of the file it has read (offset), so changes appended by
+# another process can be read later without reading the whole log again.
+# The first line of the log is a header such as {"op": "start", "generation": 4, "snapshot": [...]} that names the
+# snapshot the changes were made on top of, so a log left over from an older snapshot can be recognised (see header).
+
+class Journal:
+
+    # Constructor to initialize the Journal with the path of the log file.
+
+    def __init__(self, path):
+        self.path = path
+        self.entry_count = 0
+        self.offset = 0
+        self.header = None
+
+    # Append a single change to the end of the log and flush it to disk.
+    # Each entry is a dictionary such as {"op": "update", "ID": 3, ...}.
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    # Append several changes with a single write and flush.
+    # Everything after the last complete line that was read (a half-written line left by a crash) is cut off first,
+    # so the new entries never end up behind a broken line. Callers that share the log with other processes
+    # must read the new entries with read_new() before appending.
+    # A new log is started with the given header fields, which are kept in header.
+
+    def append_many(self, entries, header=None):
+        data = ''.join(json.dumps(entry) + '\n' for entry in entries).encode('utf-8')
+        if self.offset == 0 and header is not None:
+            self.header = dict({"op": "start"}, **header)
+            data = (json.dumps(self.header) + '\n').encode('utf-8') + data
+        with open(self.path, 'ab') as file:
+            if file.tell() > self.offset:
+                file.truncate(self.offset)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self.offset += len(data)
+        self.entry_count += len(entries)
+
+    # Read all entries from the log in the order they were written.
+    # A half-written last line (from a crash during append) is ignored.
+
+    def replay(self):
+        self.entry_count = 0
+        self.offset = 0
+        self.header = None
+        return self.read_new()
+
+    # Read the entries added to the log since the last replay(), read_new() or append.
+    # If the log was cleared or replaced by a shorter one, it is read from the start.
+    # The header line is kept in header instead of being returned, and is None for a log written without one.
+
+    def read_new(self):
+        entries = []
+        try:
+            with open(self.path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < self.offset:
+                    self.entry_count = 0
+                    self.offset = 0
+                    self.header = None
+                file.seek(self.offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    if line.strip():
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            break
+                        if self.offset == 0 and entry.get('op') == 'start':
+                            self.header = entry
+                        else:
+                            entries.append(entry)
+                    self.offset += len(line)
+        except FileNotFoundError:
+            self.entry_count = 0
+            self.offset = 0
+            self.header = None
+        self.entry_count += len(entries)
+        return entries
+
+    # Get the current size of the log file, or 0 if it does not exist.
+    # A size different from offset means another process has changed the log.
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    # Empty the log after its changes have been written to a fresh snapshot.
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entry_count = 0
+        self.offset = 0
+        self.header = None
+
+
+# Apply journal entries to an EmployeeTable (see records.py).
+# Adding an employee whose ID is already in the table updates them instead, so entries merged again never
+# duplicate employees. This does not make a journal safe to apply to a newer snapshot, whose newer values it
+# would overwrite: JSONStorage checks the journal header first and skips a journal left over from an older snapshot.
+# If a changes list is given, every change to the table is appended to it as a tuple
+# ('added' | 'updated' | 'removed', employee before, employee after), with None for a missing side.
+
+def apply_entries(table, entries, changes=None):
+    for entry in entries:
+        op = entry.get('op')
+        if op == 'add':
+            emp = entry['employee']
+            old = table.get(emp['ID']) if changes is not None else None
+            if emp['ID'] in table:
+                table.update(emp['ID'], emp['name'], emp['department'], emp['salary'])
+            else:
+                table.append(emp)
+            if changes is not None:
+                changes.append(('updated' if old is not None else 'added', old, table.get(emp['ID'])))
+        elif op == 'update':
+            old = table.get(entry['ID']) if changes is not None else None
+            if table.update(entry['ID'], entry['name'], entry['department'], entry['salary']) and changes is not None:
+                changes.append(('updated', old, table.get(entry['ID'])))
+        elif op == 'remove':
+            old = table.get(entry['ID']) if changes is not None else None
+            if table.remove(entry['ID']) and changes is not None:
+                changes.append(('removed', old, None))
+    return table
\ No newline at end of file
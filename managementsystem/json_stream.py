@@ -0,0 +1,166 @@
+# Streaming reader and writer for employee files
+
+import json # for decoding and encoding records
+import os # for the file size and read position reported while loading
+from json.encoder import encode_basestring_ascii # for encoding text fields exactly like json.dumps
+import sys # for sharing key strings between JSON Lines records
+from validators import validate_employee_data # for validating each record as it is read
+
+# Number of characters read from the file at a time.
+
+CHUNK_SIZE = 1024 * 1024
+
+# Number of employees read between two reports to the progress function of read_employees.
+
+PROGRESS_INTERVAL = 10000
+
+# Check if a path uses the JSON Lines format (one employee per line) instead of a JSON list.
+
+def is_json_lines(path):
+    return path.lower().endswith('.jsonl')
+
+# Read the items of a JSON list one chunk at a time.
+# Each chunk is cut after its last '}' and the complete records before the cut are decoded with one json.loads call.
+# If the cut falls inside a string or a nested object, decoding fails and the next chunk is read before trying again.
+# Broken data fails the same way however much is read, so it raises at once instead of reading the rest of the file.
+# Only the current chunk and its records are held in memory, never the whole file.
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    buffer = ''
+    started = False
+    eof = False
+    while not eof:
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        if not started:
+            buffer = buffer.lstrip()
+            if not buffer and not eof:
+                continue
+            if not buffer.startswith('['):
+                raise ValueError("Data must be a list of employees")
+            buffer = buffer[1:]
+            started = True
+        if eof:
+            body = buffer.rstrip()
+            if not body.endswith(']'):
+                raise ValueError("Invalid JSON: the list of employees is not closed")
+            body = body[:-1]
+            cut = len(buffer)
+        else:
+            cut = buffer.rfind('}') + 1
+            if cut == 0:
+                continue
+            body = buffer[:cut]
+        body = body.strip()
+        if body.startswith(','):
+            body = body[1:]
+        if body:
+            text = '[' + body + ']'
+            try:
+                records = json.loads(text)
+            except json.JSONDecodeError as e:
+                if eof or not is_cut_short(e, text):
+                    raise
+                continue
+            yield from records
+        buffer = buffer[cut:]
+
+# Check if a decoding error of iter_json_array can come from a cut inside a record rather than from broken data:
+# the text ended while a value was still open (the error is at the closing bracket added after the cut) or
+# a string is not closed before the end of the text. Any other error would not go away by reading more.
+
+def is_cut_short(error, text):
+    return error.pos >= len(text) - 1 or error.msg.startswith('Unterminated string')
+
+# Read one JSON value per line, skipping empty lines.
+# Each line is decoded separately, so the keys are interned to keep one copy of "name", "ID", ... for all records.
+
+def iter_json_lines(file):
+    for line in file:
+        if line.strip():
+            value = json.loads(line)
+            if isinstance(value, dict):
+                value = {sys.intern(key): item for key, item in value.items()}
+            yield value
+
+# Read and validate employees from a JSON or JSON Lines file one at a time.
+# Each record is checked for the required keys and duplicate IDs as soon as it is read.
+# progress, if given, is called after every PROGRESS_INTERVAL employees and at the end as progress(batch, position, size):
+# batch is the list of employees read since the last call, position the number of bytes read so far and size the file size.
+
+def read_employees(path, progress=None):
+    ids = set()
+    with open(path, 'r') as file:
+        records = iter_json_lines(file) if is_json_lines(path) else iter_json_array(file)
+        if progress is None:
+            for emp in records:
+                validate_employee_data(emp, ids)
+                yield emp
+            return
+        size = os.fstat(file.fileno()).st_size
+        batch = []
+        for emp in records:
+            validate_employee_data(emp, ids)
+            batch.append(emp)
+            yield emp
+            if len(batch) == PROGRESS_INTERVAL:
+                progress(batch, min(os.lseek(file.fileno(), 0, os.SEEK_CUR), size), size)
+                batch = []
+        progress(batch, size, size)
+
+# Encoder that puts each field of a flat record on its own line, indented like json.dump(..., indent=4).
+# Without the indent option the fast C encoder is used, which json.dumps with indent does not do.
+
+FIELD_ENCODER = json.JSONEncoder(separators=(',\n        ', ': '))
+
+# Layout of an employee record with exactly the usual fields, as written by json.dump(..., indent=4).
+
+EMPLOYEE_FIELDS = ('name', 'ID', 'department', 'salary')
+EMPLOYEE_TEMPLATE = '{\n        "name": %s,\n        "ID": %d,\n        "department": %s,\n        "salary": %d\n    }'
+
+# Layout of the same record on one line, as written by json.dumps.
+
+EMPLOYEE_LINE_TEMPLATE = '{"name": %s, "ID": %d, "department": %s, "salary": %d}'
+
+# Fill an employee into a template if it has exactly the usual fields with plain text and integer values.
+# Returns None for any other record.
+
+def fill_template(template, emp):
+    if tuple(emp) == EMPLOYEE_FIELDS:
+        name, emp_id, department, salary = emp['name'], emp['ID'], emp['department'], emp['salary']
+        if type(name) is str and type(department) is str and type(emp_id) is int and type(salary) is int:
+            return template % (encode_basestring_ascii(name), emp_id, encode_basestring_ascii(department), salary)
+    return None
+
+# Encode one employee on a single line, the same as json.dumps.
+
+def encode_line(emp):
+    line = fill_template(EMPLOYEE_LINE_TEMPLATE, emp)
+    return line if line is not None else json.dumps(emp)
+
+# Encode one employee in the layout of json.dump(..., indent=4) for an item of the top-level list.
+# The usual employee record is filled into a template, with the C string encoder of the json module for the text fields.
+# Other records use the field encoder, and records with nested values fall back to json.dumps with indent.
+
+def encode_indented(emp):
+    text = fill_template(EMPLOYEE_TEMPLATE, emp)
+    if text is not None:
+        return text
+    if not emp or any(isinstance(value, (dict, list)) for value in emp.values()):
+        return json.dumps(emp, indent=4).replace('\n', '\n    ')
+    return '{\n        ' + FIELD_ENCODER.encode(emp)[1:-1] + '\n    }'
+
+# Write employees to an open file, as JSON Lines or as an indented JSON list.
+# The employees can be any iterable and are written one at a time; the list format is the same as json.dump(..., indent=4).
+
+def write_employees(file, employees, json_lines=False):
+    if json_lines:
+        for emp in employees:
+            file.write(encode_line(emp) + '\n')
+        return
+    separator = '[\n    '
+    for emp in employees:
+        file.write(separator + encode_indented(emp))
+        separator = ',\n    '
+    file.write('[]' if separator == '[\n    ' else '\n]')
@@ -1,14 +1,37 @@
 # Author: Luka Niemelä
 # Employee Management System
 
-from tkinter import Tk
+import argparse # for the command line options
+from tkinter import Tk, messagebox
 from gui import EmployeeGUI
+from employee_manager import EmployeeManager
+from storage import FILE_PATH, JSONStorage, open_storage
+from instrumentation import INSTRUMENTATION
 
 # This is the main entry point for the Employee Management System.
 # It initializes the GUI and sets up the main application window.
+# An optional command line argument selects the data file, for example "python main.py employees.db" for SQLite.
+# With --instrument the manager, validators and view handlers are timed and Ctrl+Shift+D opens the diagnostics window;
+# --instrument-log also writes the figures, slow calls and profiles to a JSON Lines log file.
+# A JSON file is loaded on a background thread after the window is shown; --load-first loads it before, as it used to be.
+# If the data file holds an invalid employee record, the error is shown and the program exits without touching the file.
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Employee Management System")
+    parser.add_argument('path', nargs='?', default=FILE_PATH, help="employee data file (.json, .jsonl, a binary .bin snapshot or an SQLite .db file)")
+    parser.add_argument('--instrument', action='store_true', help="time the hot paths and enable the diagnostics window")
+    parser.add_argument('--instrument-log', metavar='FILE', help="write the timing figures to this JSON Lines log file")
+    parser.add_argument('--load-first', action='store_true', help="load all employees before showing the window")
+    args = parser.parse_args()
+    if args.instrument or args.instrument_log:
+        INSTRUMENTATION.enable(log_path=args.instrument_log)
     root = Tk()
-    app = EmployeeGUI(root)
+    try:
+        storage = open_storage(args.path, load_now=args.load_first)
+    except ValueError as e:
+        messagebox.showerror("Error", f"Could not load employees: {e}")
+        root.destroy()
+        raise SystemExit(1)
+    app = EmployeeGUI(root, EmployeeManager(storage), load_in_background=isinstance(storage, JSONStorage) and not args.load_first)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
\ No newline at end of file
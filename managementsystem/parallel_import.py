@@ -0,0 +1,187 @@
+# Parallel parsing and validation of large employee files
+
+import io # for reading a chunk of text like a file
+import json # for decoding records
+import mmap # for finding chunk boundaries without reading the file into memory
+import os # for the file size and the number of processors
+from collections import deque # for keeping a few chunks in flight in file order
+from concurrent.futures import ProcessPoolExecutor # for using every core
+from json_stream import is_json_lines, iter_json_lines, iter_json_array # for telling the formats apart and the serial path
+from validators import record_errors, validate_records, DUPLICATE_ID_ERROR # for the same checks as the serial path
+
+# Size in bytes of the chunks a file is split into. Each chunk is parsed and validated by one worker process.
+
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Number of chunks handed to the pool per worker before the first result is used,
+# so the workers are never idle while the results are merged, but the whole file is never held in memory.
+
+CHUNKS_AHEAD = 2
+
+# Number of bytes read from each end of a JSON file to check that it holds a list.
+
+CHECK_BYTES = 4096
+
+# Get the number of worker processes to use: the given number, or one per processor for 0 or None.
+
+def worker_count(workers=None):
+    return workers if workers else os.cpu_count() or 1
+
+# Split a file into (start, end) byte ranges of about chunk_bytes that end after a line break.
+# If csv_quotes is True, a chunk only ends at a line break after an even number of quote characters, so a quoted
+# CSV field that holds a line break is never split. (A quote character inside an unquoted field, which the csv module
+# keeps as text, would upset the count; such rows are rejected by the name and department checks anyway.)
+
+def split_file(path, chunk_bytes=CHUNK_BYTES, csv_quotes=False):
+    size = os.path.getsize(path)
+    if size == 0:
+        return [(0, 0)]
+    ranges = []
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            end = start
+            search = min(start + chunk_bytes, size) - 1
+            quotes = 0
+            while True:
+                newline = data.find(b'\n', search)
+                line_end = size if newline < 0 else newline + 1
+                if csv_quotes:
+                    quotes += data[end:line_end].count(b'"')
+                end = search = line_end
+                if end == size or quotes % 2 == 0:
+                    break
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+# Read a byte range of a file as text.
+# The range starts and ends at line breaks, so it never cuts a UTF-8 character in two.
+
+def read_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        return file.read(end - start).decode('utf-8')
+
+# Count the lines of a chunk the same way as iterating over a file opened with newline='' does,
+# so the line numbers of later chunks can be offset by it.
+
+def count_lines(text):
+    return sum(1 for _ in io.StringIO(text, newline=''))
+
+# Run a function on every chunk of a file in a pool of worker processes and yield the results in file order.
+# The function is called as function(path, start, end, *args) and must be defined at module level so it can be
+# sent to the workers. Only a few chunks per worker are in flight at a time.
+
+def map_chunks(function, path, ranges, workers, *args):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(executor.submit(function, path, start, end, *args))
+            if len(pending) >= workers * CHUNKS_AHEAD:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# Decode the employee records of a chunk of a JSON Lines or JSON file.
+# A JSON chunk holds whole items of the top-level list: the opening bracket of the first chunk, the closing
+# bracket of the last chunk and the commas between the items are removed before the items are decoded together.
+# Raises ValueError if the chunk is not valid JSON; for a JSON file that can also mean a record was split
+# (see validate_file).
+
+def decode_records(text, json_lines):
+    if json_lines:
+        return [json.loads(line) for line in io.StringIO(text, newline=None) if line.strip()]
+    body = text.strip()
+    if body.startswith('['):
+        body = body[1:].lstrip()
+    if body.endswith(']'):
+        body = body[:-1].rstrip()
+    body = body.strip(',')
+    return json.loads('[' + body + ']') if body else []
+
+# Worker: decode and validate the employee records of one chunk with the checks of validate_records.
+# Duplicate IDs are only found within the chunk; the IDs seen for the first time are returned for the merge step.
+# Returns the number of records, the errors as (index in the chunk, messages) pairs and the (index, ID) pairs of
+# the records whose ID was seen for the first time in the chunk.
+
+def validate_chunk(path, start, end, json_lines):
+    records = decode_records(read_range(path, start, end), json_lines)
+    ids = set()
+    errors = []
+    first_ids = []
+    for index, emp in enumerate(records):
+        seen = len(ids)
+        messages = record_errors(emp, ids)
+        if messages:
+            errors.append((index, list(messages)))
+        if len(ids) > seen:
+            first_ids.append((index, emp['ID']))
+    return len(records), errors, first_ids
+
+# Join the ranges from split_file until each one starts at a line that starts a new item of the top-level list,
+# so no record of a JSON file is split in two. Snapshots are written with one field per line (see write_employees);
+# a file on a single line stays in one range.
+
+def record_ranges(path, ranges):
+    joined = []
+    with open(path, 'rb') as file:
+        for start, end in ranges:
+            file.seek(start)
+            if joined and not file.readline().lstrip().startswith(b'{'):
+                joined[-1] = (joined[-1][0], end)
+            else:
+                joined.append((start, end))
+    return joined
+
+# Validate every employee record of a JSON Lines or JSON file with the given number of worker processes.
+# Returns the same list of (record index, error message) pairs as validate_records on the records of the file,
+# in the same order. Each chunk is checked on its own and duplicate IDs across chunks are found in a merge step
+# that goes through the chunks in file order, so the first record with an ID keeps it and every later one is reported.
+# With one worker, or if a chunk cannot be decoded on its own, the file is validated serially instead,
+# so also errors in the file itself are raised the same way.
+
+def validate_file(path, workers=None, chunk_bytes=CHUNK_BYTES):
+    workers = worker_count(workers)
+    json_lines = is_json_lines(path)
+    if workers > 1 and (json_lines or is_json_list(path)):
+        ranges = split_file(path, chunk_bytes)
+        if not json_lines:
+            ranges = record_ranges(path, ranges)
+        try:
+            return merge_errors(map_chunks(validate_chunk, path, ranges, workers, json_lines))
+        except ValueError:
+            pass
+    with open(path, 'r') as file:
+        return validate_records(iter_json_lines(file) if json_lines else iter_json_array(file))
+
+# Check that a JSON file holds a list, that is, starts with '[' and ends with ']'.
+# Anything else is left to the serial path, which raises the same errors as loading the file.
+
+def is_json_list(path):
+    with open(path, 'rb') as file:
+        data = file.read(CHECK_BYTES).lstrip()
+        if not data.startswith(b'['):
+            return False
+        file.seek(max(0, os.fstat(file.fileno()).st_size - CHECK_BYTES))
+        return file.read().rstrip().endswith(b']')
+
+# Merge the results of validate_chunk in file order into the result of validate_records.
+# An ID seen for the first time in a chunk that an earlier chunk already had is a duplicate. The record had no
+# ID error in its chunk, so the duplicate error goes first, where the serial check reports ID errors.
+
+def merge_errors(results):
+    ids = set()
+    errors = []
+    offset = 0
+    for count, chunk_errors, first_ids in results:
+        messages = dict(chunk_errors)
+        for index, emp_id in first_ids:
+            if emp_id in ids:
+                messages[index] = [DUPLICATE_ID_ERROR] + messages.get(index, [])
+            else:
+                ids.add(emp_id)
+        for index in sorted(messages):
+            errors.extend((offset + index, message) for message in messages[index])
+        offset += count
+    return errors
\ No newline at end of file
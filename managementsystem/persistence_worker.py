@@ -0,0 +1,70 @@
+# Background thread that writes employee data to disk
+
+import queue # for passing save requests and results between threads
+import threading # for the worker thread
+
+# Markers put in the request queue.
+
+SAVE = 'save'
+STOP = 'stop'
+
+# PersistenceWorker class to move all disk writes of a storage backend off the Tk thread.
+# The storage is switched to deferred mode, so changes are only collected in memory; the worker
+# then writes them with storage.flush(). Requests that pile up while a write is running are handled by one flush.
+# The worker never calls Tk itself. Results are put in a queue that the GUI reads with root.after (see poll_results).
+
+class PersistenceWorker:
+
+    # Constructor to start the worker thread for the given storage backend.
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.storage.deferred = True
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='PersistenceWorker', daemon=True)
+        self.thread.start()
+
+    # Ask the worker to write the pending changes.
+
+    def request_save(self):
+        self.requests.put(SAVE)
+
+    # Main loop of the worker thread.
+    # After taking one request, all other waiting requests are taken too, so they share a single flush.
+
+    def run(self):
+        while True:
+            stop = self.requests.get() == STOP
+            while True:
+                try:
+                    stop = self.requests.get_nowait() == STOP or stop
+                except queue.Empty:
+                    break
+            try:
+                self.storage.flush()
+                self.results.put(None)
+            except Exception as e:
+                self.results.put(e)
+            if stop:
+                return
+
+    # Get the results of the writes finished since the last call: None for a successful write, or the error.
+
+    def poll_results(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    # Write everything that is still pending and stop the thread.
+    # The storage goes back to writing every change immediately.
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.requests.put(STOP)
+            self.thread.join()
+        self.storage.deferred = False
+        self.storage.flush()
@@ -0,0 +1,182 @@
+# Lazy query results for EmployeeManager
+
+import base64 # for making cursors safe to put in a URL
+import json # for encoding cursors
+from bisect import bisect_left, bisect_right # for finding where a cursor continues in a sorted order
+from itertools import islice # for reading only one page of a result
+from sort_index import sort_key # for the keys of sorted results
+
+# Filter keys understood by EmployeeManager.query, besides a plain function.
+
+FILTER_KEYS = ('search', 'department', 'min_salary', 'max_salary')
+
+# Employee fields that hold text; the other sortable fields hold whole numbers.
+
+TEXT_FIELDS = ('name', 'department')
+
+# Share of all employees below which the matches of a search are sorted directly. With more matches
+# the cached sort order of all employees is walked instead and the employees that do not match are skipped.
+
+SORT_MATCHES_SHARE = 1 / 16
+
+# Encode the position after an employee in a sort order as a cursor: the employee's values of the sort fields
+# and its ID, as URL-safe text.
+
+def encode_cursor(spec, emp):
+    values = [emp[field] for field, _ in spec] + [emp['ID']]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+# Decode a cursor made by encode_cursor into the sort key of the employee it points after.
+# Raises ValueError if the cursor is broken or was made for a different sort order.
+
+def decode_cursor(spec, cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    fields = [field for field, _ in spec] + ['ID']
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Invalid cursor")
+    for field, value in zip(fields, values):
+        if type(value) is not (str if field in TEXT_FIELDS else int):
+            raise ValueError("Invalid cursor")
+    return sort_key(spec, dict(zip(fields, values)))
+
+# Turn the salary limits of a filter into a function that checks an employee, or None if there are no limits.
+
+def salary_predicate(min_salary, max_salary):
+    if min_salary is None and max_salary is None:
+        return None
+    low = float('-inf') if min_salary is None else min_salary
+    high = float('inf') if max_salary is None else max_salary
+    return lambda emp: low <= emp['salary'] <= high
+
+# QueryResult class for the result of EmployeeManager.query.
+# Nothing is read when the result is created. Iterating yields the matching employees one at a time in order,
+# and slicing reads only the rows of the slice, so a page of a large roster is cheap to get.
+# rows(start) must return an iterator over the candidate employees from the given position on;
+# size is their number, or None if it is not known without reading them. predicate, if given, is checked
+# for every candidate. offset and limit select the part of the matches that belongs to this result.
+# The result is a view of the live data: reading it again after a change gives the changed rows.
+
+class QueryResult:
+
+    # Constructor to initialize the QueryResult with its candidates, filter and page.
+
+    def __init__(self, rows, size, predicate=None, offset=0, limit=None, spec=None):
+        self.rows = rows
+        self.size = size
+        self.predicate = predicate
+        self.offset = offset
+        self.limit = limit
+        self.spec = spec
+        self.match_count = None
+
+    # Iterate over the employees of the result.
+
+    def __iter__(self):
+        return self.read(0, self.limit)
+
+    # Read up to count employees (all if count is None) from the given position within the result.
+    # Without a predicate the candidates are read from that position directly; otherwise the matches are counted off.
+
+    def read(self, start, count):
+        start += self.offset
+        if self.limit is not None:
+            end = self.offset + self.limit
+            count = end - start if count is None else min(count, end - start)
+        if count is not None and count <= 0:
+            return iter(())
+        stop = None if count is None else start + count
+        if self.predicate is None:
+            return islice(self.rows(start), stop - start if stop is not None else None)
+        return islice(filter(self.predicate, self.rows(0)), start, stop)
+
+    # Get the number of employees that match, before offset and limit are applied.
+    # If the filter has a function or salary limits, the candidates are read once to count the matches.
+
+    @property
+    def total(self):
+        if self.predicate is None and self.size is not None:
+            return self.size
+        if self.match_count is None:
+            rows = self.rows(0)
+            self.match_count = sum(1 for emp in rows if self.predicate is None or self.predicate(emp))
+        return self.match_count
+
+    # Get the number of employees in the result, after offset and limit.
+
+    def __len__(self):
+        count = max(0, self.total - self.offset)
+        return count if self.limit is None else min(count, self.limit)
+
+    # Get one employee or a list of employees by position in the result, for example result[:100].
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start, index.stop, index.step
+            if (start is not None and start < 0) or (stop is not None and stop < 0) or step not in (None, 1):
+                return list(self)[index]
+            start = start or 0
+            return list(self.read(start, None if stop is None else stop - start))
+        if index < 0:
+            index += len(self)
+        rows = list(self.read(index, 1)) if index >= 0 else []
+        if not rows:
+            raise IndexError("Query result index out of range")
+        return rows[0]
+
+    # Read the result as one page. Returns the employees and the cursor for the next page, which is None if
+    # this was the last page or the query has no order_by. Pass the cursor to query() to continue after this page;
+    # unlike an offset, a cursor still points to the right place after employees were added or removed.
+
+    def page(self):
+        employees = list(self)
+        cursor = None
+        if self.spec is not None and employees and self.limit is not None and len(employees) == self.limit:
+            cursor = encode_cursor(self.spec, employees[-1])
+        return employees, cursor
+
+
+# Build the candidates of a query in the order of the storage, as (rows, size) for QueryResult.
+# ids, if given, is the set of IDs found by the search index; they are read in ID order.
+
+def storage_rows(storage, ids):
+    if ids is None:
+        employees = storage.all()
+        return (lambda start: (employees[pos] for pos in range(start, len(employees)))), len(employees)
+    ordered = sorted(ids)
+    return (lambda start: (storage.get(ordered[pos]) for pos in range(start, len(ordered)))), len(ordered)
+
+# Build the candidates of a query in a cached sort order, as (rows, size) for QueryResult.
+# keys and order_ids are the sort keys and IDs of all employees (see SortIndex.get_order); if reverse is True the
+# order is read backwards. The candidates start after the cursor key, if given, and are limited to ids, if given.
+
+def ordered_rows(storage, keys, order_ids, reverse, cursor_key=None, ids=None):
+    if cursor_key is None:
+        first = 0
+    elif reverse:
+        first = len(order_ids) - bisect_left(keys, cursor_key)
+    else:
+        first = bisect_right(keys, cursor_key)
+
+    def rows(start):
+        count = len(order_ids)
+        if reverse:
+            ordered = (order_ids[count - 1 - pos] for pos in range(first, count))
+        else:
+            ordered = (order_ids[pos] for pos in range(first, count))
+        if ids is None:
+            return (storage.get(emp_id) for emp_id in islice(ordered, start, None))
+        return (storage.get(emp_id) for emp_id in islice((emp_id for emp_id in ordered if emp_id in ids), start, None))
+
+    if ids is None:
+        return rows, len(order_ids) - first
+    return rows, (len(ids) if cursor_key is None else None)
+
+# Build the candidates of a query by sorting the few employees found by the search index, as (rows, size).
+# The employees are sorted like a cached order (see ordered_rows), so both give the same order and cursors.
+
+def sorted_rows(storage, spec, ids, reverse, cursor_key=None):
+    pairs = sorted((sort_key(spec, emp), emp['ID']) for emp in (storage.get(emp_id) for emp_id in ids) if emp is not None)
+    return ordered_rows(storage, [key for key, _ in pairs], [emp_id for _, emp_id in pairs], reverse, cursor_key)
\ No newline at end of file
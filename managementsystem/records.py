@@ -0,0 +1,149 @@
+# Compact column-based storage for employee records
+
+import sys # for interning department names
+from array import array # for storing IDs and salaries as plain 64-bit integers
+
+# Append a value to a column, switching the column from an array to a list if the value is not a 64-bit integer.
+# Returns the column, which may be a new list.
+
+def append_value(column, value):
+    try:
+        column.append(value)
+    except (TypeError, OverflowError):
+        column = list(column)
+        column.append(value)
+    return column
+
+# Set a value in a column, switching the column from an array to a list if the value is not a 64-bit integer.
+# Returns the column, which may be a new list.
+
+def set_value(column, pos, value):
+    try:
+        column[pos] = value
+    except (TypeError, OverflowError):
+        column = list(column)
+        column[pos] = value
+    return column
+
+# EmployeeTable class to hold employees in columns instead of one dictionary per employee.
+# IDs and salaries are kept in array('q') columns (8 bytes each), names in a list and departments as
+# interned strings, so every employee in a department shares one string object. An index maps each ID
+# to its row. Rows are handed out as new dictionaries, so the rest of the program and JSON serialization
+# still see the usual {"name", "ID", "department", "salary"} shape.
+
+class EmployeeTable:
+
+    # Constructor to build the table from an iterable of employee dictionaries.
+
+    def __init__(self, employees=()):
+        self.ids = array('q')
+        self.names = []
+        self.departments = []
+        self.salaries = array('q')
+        self.index = {}
+        for emp in employees:
+            self.append(emp)
+
+    # Get the number of employees.
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Check if an employee ID is in the table.
+
+    def __contains__(self, emp_id):
+        return emp_id in self.index
+
+    # Get the row at a position as a dictionary, or a list of dictionaries for a slice.
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.row(i) for i in range(*pos.indices(len(self.ids)))]
+        if pos < 0:
+            pos += len(self.ids)
+        if not 0 <= pos < len(self.ids):
+            raise IndexError("Employee table index out of range")
+        return self.row(pos)
+
+    # Iterate over the employees as dictionaries.
+
+    def __iter__(self):
+        for pos in range(len(self.ids)):
+            yield self.row(pos)
+
+    # Build the dictionary for the row at a position.
+
+    def row(self, pos):
+        return {"name": self.names[pos], "ID": self.ids[pos], "department": self.departments[pos], "salary": self.salaries[pos]}
+
+    # Get an employee by ID as a dictionary, or None if there is no such employee.
+
+    def get(self, emp_id):
+        pos = self.index.get(emp_id)
+        if pos is None:
+            return None
+        return self.row(pos)
+
+    # Get the largest ID in the table, or 0 if the table is empty.
+
+    def max_id(self):
+        return max(self.ids) if self.ids else 0
+
+    # Add an employee to the end of the table.
+    # Raises KeyError if a field is missing and ValueError if the ID is already in the table.
+
+    def append(self, emp):
+        emp_id, name, department, salary = emp['ID'], emp['name'], emp['department'], emp['salary']
+        if emp_id in self.index:
+            raise ValueError("Duplicate employee IDs found")
+        self.index[emp_id] = len(self.ids)
+        self.ids = append_value(self.ids, emp_id)
+        self.names.append(name)
+        self.departments.append(sys.intern(department) if type(department) is str else department)
+        self.salaries = append_value(self.salaries, salary)
+
+    # Change the name, department and salary of an employee. Returns False if the ID does not exist.
+
+    def update(self, emp_id, name, department, salary):
+        pos = self.index.get(emp_id)
+        if pos is None:
+            return False
+        self.names[pos] = name
+        self.departments[pos] = sys.intern(department) if type(department) is str else department
+        self.salaries = set_value(self.salaries, pos, salary)
+        return True
+
+    # Change only the salary of an employee. Returns False if the ID does not exist.
+
+    def set_salary(self, emp_id, salary):
+        pos = self.index.get(emp_id)
+        if pos is None:
+            return False
+        self.salaries = set_value(self.salaries, pos, salary)
+        return True
+
+    # Remove an employee by ID. Returns False if the ID does not exist.
+    # The rows after it move up one position, so the table keeps the order the employees were added in,
+    # and their index entries are renumbered in one update.
+
+    def remove(self, emp_id):
+        pos = self.index.pop(emp_id, None)
+        if pos is None:
+            return False
+        del self.ids[pos]
+        del self.names[pos]
+        del self.departments[pos]
+        del self.salaries[pos]
+        self.index.update(zip(self.ids[pos:], range(pos, len(self.ids))))
+        return True
+
+    # Make a copy of the table. The columns are copied as a whole, which is much cheaper than copying dictionaries.
+
+    def copy(self):
+        table = EmployeeTable()
+        table.ids = self.ids[:]
+        table.names = self.names[:]
+        table.departments = self.departments[:]
+        table.salaries = self.salaries[:]
+        table.index = dict(self.index)
+        return table
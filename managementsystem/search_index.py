@@ -0,0 +1,107 @@
+# Search index for finding employees by name or department
+
+# Longest n-gram stored in the index. Search terms up to this length are answered with one lookup,
+# longer terms are answered by intersecting their n-grams and checking the few remaining candidates.
+
+NGRAM_SIZE = 3
+
+# Get all n-grams of length 1 to NGRAM_SIZE in a string.
+
+def ngrams(text):
+    grams = set()
+    for size in range(1, NGRAM_SIZE + 1):
+        for start in range(len(text) - size + 1):
+            grams.add(text[start:start + size])
+    return grams
+
+# SearchIndex class to keep lowercase copies of names and departments and inverted indexes over them.
+# The index is updated one employee at a time, so adding, updating or removing never rebuilds it.
+
+class SearchIndex:
+
+    # Constructor to build the index from a list of employees.
+
+    def __init__(self, employees=()):
+        self.fields = {}
+        self.departments = {}
+        self.grams = {}
+        self.department_grams = {}
+        for emp in employees:
+            self.add(emp)
+
+    # Add an employee to the index. If the ID is already indexed, its old name and department are replaced.
+
+    def add(self, emp):
+        if emp['ID'] in self.fields:
+            self.remove(emp['ID'])
+        name = emp['name'].lower()
+        department = emp['department'].lower()
+        self.fields[emp['ID']] = (name, department)
+        self.departments.setdefault(department, set()).add(emp['ID'])
+        for gram in ngrams(name) | self.get_department_grams(department):
+            self.grams.setdefault(gram, set()).add(emp['ID'])
+
+    # Remove an employee from the index by ID.
+
+    def remove(self, emp_id):
+        fields = self.fields.pop(emp_id, None)
+        if fields is None:
+            return
+        name, department = fields
+        self.discard(self.departments, department, emp_id)
+        for gram in ngrams(name) | self.get_department_grams(department):
+            self.discard(self.grams, gram, emp_id)
+
+    # Get the n-grams of a department name.
+    # There are only a few departments, so their n-grams are computed once and reused.
+
+    def get_department_grams(self, department):
+        grams = self.department_grams.get(department)
+        if grams is None:
+            grams = self.department_grams[department] = ngrams(department)
+        return grams
+
+    # Replace the indexed name and department of an employee.
+
+    def update(self, emp):
+        self.remove(emp['ID'])
+        self.add(emp)
+
+    # Remove an ID from one posting set and drop the set when it becomes empty.
+
+    @staticmethod
+    def discard(index, key, emp_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(emp_id)
+            if not ids:
+                del index[key]
+
+    # Get the IDs of employees whose name or department contains the search term (case-insensitive), in ID order.
+    # If a department is given, only employees in exactly that department are returned.
+
+    def search(self, term, department=None):
+        return sorted(self.matching_ids(term, department))
+
+    # Get the IDs of the employees matching a search like search(), as an unordered set (or view of the indexed IDs).
+
+    def matching_ids(self, term, department=None):
+        term = term.lower()
+        if department is not None:
+            candidates = self.departments.get(department.lower(), set())
+        else:
+            candidates = None
+
+        if term:
+            if len(term) <= NGRAM_SIZE:
+                matches = self.grams.get(term, set())
+            else:
+                posting_sets = sorted((self.grams.get(term[i:i + NGRAM_SIZE], set())
+                                       for i in range(len(term) - NGRAM_SIZE + 1)), key=len)
+                matches = set.intersection(*posting_sets)
+                matches = {emp_id for emp_id in matches
+                           if term in self.fields[emp_id][0] or term in self.fields[emp_id][1]}
+            candidates = matches if candidates is None else candidates & matches
+        elif candidates is None:
+            candidates = self.fields.keys()
+        return candidates
@@ -0,0 +1,115 @@
+# Cached sort orders for the employee list
+
+from bisect import bisect_left # for finding positions in the sorted orders
+
+# Employee fields that can be sorted. Text fields are compared without case.
+
+SORT_FIELDS = ('ID', 'name', 'department', 'salary')
+
+# Wrapper that reverses the comparison of a text value, so descending text columns can be mixed with ascending ones in one key.
+# Numbers are simply negated.
+
+class Descending:
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+# Turn an order_by value into a tuple of (field, descending) pairs.
+# order_by is a field name or a list of field names; a leading '-' sorts that field in descending order,
+# for example ['department', '-salary'].
+
+def parse_order(order_by):
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    spec = []
+    for field in order_by:
+        descending = field.startswith('-')
+        field = field.lstrip('-')
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {field}")
+        spec.append((field, descending))
+    return tuple(spec)
+
+# Get the sort key of an employee for a parsed order.
+# The ID is always added last, so every employee has a unique key and equal values keep a stable order.
+
+def sort_key(spec, emp):
+    key = []
+    for field, descending in spec:
+        value = emp[field]
+        if isinstance(value, str):
+            value = value.lower()
+            key.append(Descending(value) if descending else value)
+        else:
+            key.append(-value if descending else value)
+    key.append(emp['ID'])
+    return tuple(key)
+
+# SortIndex class to keep one sorted list of employee IDs per requested order.
+# An order is built with one sort the first time it is requested and then kept up to date
+# with binary search on add, update and remove, so repeated sorts cost nothing.
+
+class SortIndex:
+
+    # Constructor to initialize an empty SortIndex.
+
+    def __init__(self):
+        self.orders = {}
+
+    # Get the IDs of the employees sorted by the parsed order, building the order if needed.
+
+    def sorted_ids(self, spec, employees):
+        return self.get_order(spec, employees)[1]
+
+    # Get the sort keys and IDs of the employees in the parsed order as two lists, building the order if needed.
+
+    def get_order(self, spec, employees):
+        order = self.orders.get(spec)
+        if order is None:
+            pairs = sorted((sort_key(spec, emp), emp['ID']) for emp in employees)
+            order = self.orders[spec] = ([key for key, _ in pairs], [emp_id for _, emp_id in pairs])
+        return order
+
+    # Add an employee to every cached order. An employee that is already in an order at the same position is not added twice.
+
+    def add(self, emp):
+        for spec, (keys, ids) in self.orders.items():
+            key = sort_key(spec, emp)
+            pos = bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                continue
+            keys.insert(pos, key)
+            ids.insert(pos, emp['ID'])
+
+    # Remove an employee from every cached order. The employee is given as it was before the removal.
+
+    def remove(self, emp):
+        for spec, (keys, ids) in self.orders.items():
+            pos = bisect_left(keys, sort_key(spec, emp))
+            if pos < len(ids) and ids[pos] == emp['ID']:
+                del keys[pos]
+                del ids[pos]
+
+    # Move an employee to its new position in every cached order.
+
+    def update(self, old_emp, new_emp):
+        self.remove(old_emp)
+        self.add(new_emp)
+
+    # Check if any order is cached.
+
+    def has_orders(self):
+        return bool(self.orders)
+
+    # Drop all cached orders.
+
+    def clear(self):
+        self.orders = {}
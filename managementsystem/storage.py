@@ -0,0 +1,855 @@
+# Storage backends for the Employee Management System
+
+import json # for JSON file handling
+import logging # for warning when a snapshot or the journal cannot be used
+import os # for file paths
+import threading # for guarding the data while a background thread saves it
+from journal import Journal, apply_entries # for appending changes instead of rewriting the whole file
+from atomic_file import atomic_write, backup_paths, file_stamp # for crash-safe saves and falling back to older snapshots
+from json_stream import read_employees, write_employees, is_json_lines # for reading and writing records one at a time
+from records import EmployeeTable # for keeping employees in compact columns
+from file_lock import FileLock # for sharing the data files with other processes
+from history import History, SQLiteHistory, SQLITE_SCHEMA # for the audit log of all changes
+from binary_snapshot import MappedEmployeeTable, write_binary, is_binary # for the compact binary snapshot format
+from validators import record_errors, InvalidRecordError # for validating the employees a transaction changed
+
+logger = logging.getLogger(__name__)
+
+# This is the path to the JSON file where employee data is stored.
+
+FILE_PATH = os.path.join(os.path.dirname(__file__), 'employees.json')
+
+# Number of journal entries after which the journal is compacted into a fresh snapshot.
+
+COMPACT_THRESHOLD = 1000
+
+# Number of previous snapshots kept as employees.json.1, employees.json.2, ... when saving.
+
+BACKUP_COUNT = 3
+
+# StorageBackend class that defines the operations EmployeeManager delegates to its storage.
+# A backend stores employees as dictionaries with the keys name, ID, department and salary.
+
+class StorageBackend:
+
+    # History of all changes (see history.py), or None if the backend keeps no history.
+
+    history = None
+
+    # Load the stored data.
+    # progress, if given, is called from time to time with the employees read so far (see read_employees in json_stream.py).
+
+    def load(self, progress=None):
+        raise NotImplementedError
+
+    # Write all pending changes to permanent storage.
+
+    def save(self):
+        raise NotImplementedError
+
+    # Write the changes collected in deferred mode. Backends that write every change immediately have nothing to do.
+    # With merge False, changes another process made to the stored data are not merged on this thread: if there are
+    # any, nothing is written and False is returned, so the caller can flush again on the thread that reads the data.
+
+    def flush(self, merge=True):
+        return True
+
+    # Drop the changes collected in deferred mode that are not written yet, for example because flush() failed,
+    # and go back to the stored data. Backends that write every change immediately have nothing to drop.
+
+    def discard_pending(self):
+        pass
+
+    # Get a single employee by ID, or None if there is no such employee.
+
+    def get(self, emp_id):
+        raise NotImplementedError
+
+    # Get all employees as a list.
+
+    def all(self):
+        raise NotImplementedError
+
+    # Get the number of stored employees.
+
+    def count(self):
+        raise NotImplementedError
+
+    # Get the ID the next added employee will receive.
+
+    def next_id(self):
+        raise NotImplementedError
+
+    # Store a new employee. The employee dictionary already contains its ID.
+
+    def add(self, employee):
+        raise NotImplementedError
+
+    # Store several new employees. Each dictionary already contains its ID.
+
+    def add_many(self, employees):
+        for employee in employees:
+            self.add(employee)
+
+    # Change the name, department and salary of an employee. Returns False if the ID does not exist.
+
+    def update(self, emp_id, name, department, salary):
+        raise NotImplementedError
+
+    # Remove an employee. Returns False if the ID does not exist.
+
+    def remove(self, emp_id):
+        raise NotImplementedError
+
+    # Change the salaries of many employees. changes is an iterable of (ID, new salary) pairs; unknown IDs are skipped.
+
+    def update_salaries(self, changes):
+        for emp_id, salary in changes:
+            emp = self.get(emp_id)
+            if emp is not None:
+                self.update(emp_id, emp['name'], emp['department'], salary)
+
+    # Get the employees whose name or department contains the search term (case-insensitive).
+
+    def search(self, term):
+        term = term.lower()
+        return [emp for emp in self.all() if term in emp['name'].lower() or term in emp['department'].lower()]
+
+    # Get the employees in the given department. The name matches regardless of case.
+
+    def find_by_department(self, department):
+        department = department.lower()
+        return [emp for emp in self.all() if emp['department'].lower() == department]
+
+    # Get the department and salary of every employee as two sequences in the same order, for analytics.
+
+    def salary_columns(self):
+        employees = self.all()
+        return [emp['department'] for emp in employees], [emp['salary'] for emp in employees]
+
+    # Start a transaction. Changes are not persisted until commit() is called.
+
+    def begin(self):
+        raise NotImplementedError
+
+    # Validate and persist all changes made since begin().
+
+    def commit(self):
+        raise NotImplementedError
+
+    # Undo all changes made since begin().
+
+    def rollback(self):
+        raise NotImplementedError
+
+    # Pick up the changes another process made to the stored data since it was loaded.
+    # Returns a list of ('added' | 'updated' | 'removed', employee before, employee after) tuples,
+    # or None if the changes are not known one by one and everything has to be treated as changed.
+    # If blocking is False and the data is locked by another process, nothing is read and an empty list is returned.
+
+    def reload_if_changed(self, blocking=True):
+        return []
+
+    # Get the changes from other processes that were merged while this process was writing its own,
+    # in the same form as reload_if_changed().
+
+    def take_changes(self):
+        return []
+
+    # Release any resources held by the backend.
+
+    def close(self):
+        pass
+
+
+# JSONStorage class to keep employees in memory and store them in a JSON file.
+# Files ending in .jsonl are stored as JSON Lines (one employee per line), files ending in .bin in the binary snapshot
+# format (see binary_snapshot.py), which is read on demand instead of parsed, and other files as an indented JSON list.
+# In journaled mode every change is appended to a journal next to the JSON file,
+# and the JSON file is only rewritten when the journal is compacted.
+# In deferred mode changes are only collected in memory and written by flush(), which a background thread can call.
+# In memory the employees are kept in an EmployeeTable; get() and all() return dictionaries built from it.
+# Several processes can work on the same file. Every read and write of the files happens under an advisory lock
+# on a .lock file, and the metadata file holds a generation number that goes up with every snapshot.
+# Before writing, the storage checks the generation and the journal size: if another process appended to the
+# journal, only the new entries are read and merged; if another process wrote a new snapshot, the files are loaded again.
+# The changes of this process that are not written yet are applied again on top, so they win over older changes
+# from other processes. A new employee whose ID was taken by another process in the meantime gets the next free ID.
+
+class JSONStorage(StorageBackend):
+
+    # Constructor to initialize the JSONStorage with a filename.
+    # Unless keep_history is False, every saved change is also kept in a history next to the file (see history.py).
+    # With load_now False the file is not read yet and the storage starts empty; load() must be called before
+    # it is used, for example on a background thread while the window is already shown.
+
+    def __init__(self, file_path=FILE_PATH, journaled=True, compact_threshold=COMPACT_THRESHOLD, backup_count=BACKUP_COUNT,
+                 keep_history=True, load_now=True):
+        self.file_path = file_path
+        self.journaled = journaled
+        self.compact_threshold = compact_threshold
+        self.backup_count = backup_count
+        self.journal = Journal(os.path.splitext(file_path)[0] + '.journal')
+        self.meta_path = os.path.splitext(file_path)[0] + '.meta.json'
+        self.file_lock = FileLock(os.path.splitext(file_path)[0] + '.lock')
+        self.history = History(os.path.splitext(file_path)[0] + '.history') if keep_history else None
+        self.in_transaction = False
+        self.transaction_changes = {}
+        self.deferred = False
+        self.pending = []
+        self.snapshot_pending = False
+        self.merged_changes = []
+        self.lock = threading.RLock()
+        if load_now:
+            self.load()
+        else:
+            self.table = EmployeeTable()
+            self.next_employee_id, self.generation = 1, 0
+            self.snapshot_stamp = None
+
+    # Load employees from the JSON file, replay the journal on top of it and set the next ID counter.
+    # The counter never goes below the one saved with the data, so IDs of removed employees are not reused.
+    # If the history does not exist yet, it is started with the loaded employees.
+    # progress, if given, is called while the snapshot is read (see read_employees in json_stream.py).
+
+    def load(self, progress=None):
+        with self.file_lock, self.lock:
+            self.table = self.load_employees(progress)
+            if len(self.table):
+                self.next_employee_id = max(self.next_employee_id, self.table.max_id() + 1)
+            self.merged_changes = []
+            if self.history is not None:
+                self.history.start(self.table)
+
+    # Load employees from the JSON file and replay the journal on top of it.
+    # The next ID counter and the generation are restored from the metadata file, and the counter is moved
+    # past the added employees in the journal. If the journal cannot be applied, a warning is logged and the snapshot
+    # alone is returned.
+    # The journal is only replayed on top of the snapshot it was written for: a crash after a new snapshot was put in
+    # place but before the journal was cleared leaves an older journal, which would undo newer changes. Such a journal
+    # is recognised by its header (see journal_header), skipped with a warning and cleared.
+
+    def load_employees(self, progress=None):
+        self.next_employee_id, self.generation = self.load_meta()
+        table, path = self.load_snapshot(progress)
+        self.snapshot_stamp = file_stamp(path) if path is not None else None
+        try:
+            entries = self.journal.replay()
+            if not entries:
+                return table
+            header = self.journal.header
+            if header is not None and (header.get('generation') != self.generation or header.get('snapshot') != self.snapshot_stamp):
+                logger.warning("Skipped the journal %s, which was written before the snapshot %s", self.journal.path, path)
+                self.journal.clear()
+                return table
+            replayed = apply_entries(table.copy(), entries)
+            for entry in entries:
+                if entry.get('op') == 'add':
+                    self.next_employee_id = max(self.next_employee_id, entry['employee']['ID'] + 1)
+            return replayed
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Could not apply the journal %s, loading the snapshot without it: %s", self.journal.path, e)
+            return table
+
+    # Load the newest valid snapshot into an EmployeeTable.
+    # The file is read and validated one employee at a time and each record goes straight into the table,
+    # so neither the whole text nor a list of dictionaries is ever held in memory.
+    # A binary snapshot is mapped instead (see MappedEmployeeTable), so its records are only read when they are used.
+    # If the file is missing, or cannot be read because it is truncated or corrupted, the backups are tried from newest
+    # to oldest, with a warning for every snapshot that is skipped. If no snapshot exists, return an empty table.
+    # A snapshot that can be read but holds an invalid employee record is not skipped: falling back to an older backup
+    # would silently lose the newer data, so InvalidRecordError is raised with the path and the reason instead.
+    # Returns the table and the path it was loaded from, or None for the path if there was no snapshot.
+
+    def load_snapshot(self, progress=None):
+        binary = is_binary(self.file_path)
+        for path in [self.file_path] + backup_paths(self.file_path, self.backup_count):
+            try:
+                table = MappedEmployeeTable(path) if binary else EmployeeTable(read_employees(path, progress))
+            except FileNotFoundError:
+                continue
+            except InvalidRecordError as e:
+                raise InvalidRecordError(f"Invalid employee record in {path}: {e} "
+                                         f"(run 'python cli.py validate {path}' to list every invalid record)")
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Could not read %s, trying the previous snapshot: %s", path, e)
+                continue
+            if path != self.file_path:
+                logger.warning("Loaded the backup %s instead of %s", path, self.file_path)
+            return table, path
+        return EmployeeTable(), None
+
+    # Load the saved next ID counter and generation from the metadata file next to the JSON file.
+    # If the file does not exist or is broken, return 1 and 0.
+
+    def load_meta(self):
+        try:
+            with open(self.meta_path, 'r') as file:
+                meta = json.load(file)
+            return int(meta['next_id']), int(meta.get('generation', 0))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+            return 1, 0
+
+    # Check cheaply, without taking the lock, if another process has written a snapshot or appended to the journal.
+
+    def changed_on_disk(self):
+        return self.load_meta()[1] != self.generation or self.journal.size() != self.journal.offset
+
+    # Save employees to the JSON file and the next ID counter to the metadata file.
+
+    def save(self):
+        with self.lock:
+            entries, self.pending = self.pending, []
+            self.snapshot_pending = False
+        self.write_entries(entries, snapshot=True)
+
+    # Write a snapshot of the employees, the next ID counter and a new generation number.
+    # Both files are written atomically, and the previous snapshots are kept as backups.
+    # The journal is cleared afterwards because the snapshot now contains all of its changes. If that never happens
+    # because of a crash, the journal header no longer matches the snapshot and the journal is skipped on load.
+    # Must be called with the file lock held.
+
+    def write_snapshot(self, employees, next_id):
+        generation = max(self.generation, self.load_meta()[1]) + 1
+        if is_binary(self.file_path):
+            atomic_write(self.file_path, lambda file: write_binary(file, employees), self.backup_count, binary=True)
+        else:
+            json_lines = is_json_lines(self.file_path)
+            atomic_write(self.file_path, lambda file: write_employees(file, employees, json_lines), self.backup_count)
+        atomic_write(self.meta_path, lambda file: json.dump({"next_id": next_id, "generation": generation}, file))
+        self.journal.clear()
+        self.generation = generation
+        self.snapshot_stamp = file_stamp(self.file_path)
+
+    # Record changes to the employee data. Must be called with the lock held.
+    # Inside a transaction only the changed IDs are noted until commit(), and in deferred mode the changes are kept until flush().
+    # Returns True if the caller has to write them now with write_entries(), which is done after releasing the lock.
+
+    def record_changes(self, entries):
+        if self.in_transaction:
+            for entry in entries:
+                self.note_transaction_change(entry['op'], entry['employee']['ID'] if entry['op'] == 'add' else entry['ID'])
+            return False
+        if self.deferred:
+            self.pending.extend(entries)
+            return False
+        return True
+
+    # Record a single change, see record_changes().
+
+    def record_change(self, entry):
+        return self.record_changes([entry])
+
+    # Note that a transaction added, updated or removed an employee.
+    # Only the ID and the kind of change are kept, so a transaction with a million changes stays small.
+    # An employee added and removed again in the same transaction is forgotten.
+
+    def note_transaction_change(self, op, emp_id):
+        previous = self.transaction_changes.get(emp_id)
+        if op == 'remove' and previous == 'add':
+            del self.transaction_changes[emp_id]
+        elif previous is None or op == 'remove':
+            self.transaction_changes[emp_id] = op
+
+    # Build the journal entries for the changes noted in a transaction from the current table.
+
+    def transaction_entries(self, changes):
+        entries = []
+        for emp_id, op in changes.items():
+            emp = self.table.get(emp_id)
+            if op == 'remove':
+                entries.append({"op": "remove", "ID": emp_id})
+            elif emp is None:
+                continue
+            elif op == 'add':
+                entries.append({"op": "add", "employee": emp})
+            else:
+                entries.append({"op": "update", "ID": emp_id, "name": emp['name'], "department": emp['department'], "salary": emp['salary']})
+        return entries
+
+    # Write changes made by this process.
+    # Under the file lock the changes of other processes are merged first. Then the entries are appended to the
+    # journal, or a snapshot is written if asked for, if the journal would pass the compaction threshold or
+    # if journaling is off. A snapshot also contains the changes still waiting for flush(), so they are dropped.
+    # The data is copied under the lock and written outside it, so other threads can keep changing it during the write.
+    # The entries are also appended to the history, with the IDs they got in the merge, and so are the dropped
+    # changes of a snapshot.
+    # If the write fails, the entries are put back at the front of the changes waiting for flush() and the next
+    # write is a full snapshot, so nothing is lost and a journal append that was cut short is written over.
+    # With merge False nothing is merged: if another process changed the files, the entries are put back
+    # without writing and False is returned (see flush). Otherwise returns True.
+
+    def write_entries(self, entries, snapshot=False, merge=True):
+        with self.file_lock:
+            with self.lock:
+                if not merge and self.changed_on_disk():
+                    self.pending = entries + self.pending
+                    self.snapshot_pending = self.snapshot_pending or snapshot
+                    return False
+                self.merge_from_disk(entries + self.pending)
+                snapshot = snapshot or self.snapshot_pending or not self.journaled or \
+                    self.journal.entry_count + len(entries) >= self.compact_threshold
+                if snapshot:
+                    employees = self.table.copy()
+                    next_id = self.next_employee_id
+                    entries = entries + self.pending
+                    self.pending = []
+                    self.snapshot_pending = False
+            try:
+                if snapshot:
+                    self.write_snapshot(employees, next_id)
+                elif entries:
+                    self.journal.append_many(entries, self.journal_header())
+            except BaseException:
+                with self.lock:
+                    self.pending = entries + self.pending
+                    self.snapshot_pending = True
+                raise
+            if self.history is not None:
+                time = self.history.append(entries)
+                if snapshot and time is not None:
+                    self.history.add_checkpoint(self.file_path, time)
+        return True
+
+    # Get the header of a new journal: the generation and the identity (see file_stamp) of the snapshot the journal
+    # is written on top of. Both change when a new snapshot is written, the identity even before the metadata file is.
+
+    def journal_header(self):
+        return {"generation": self.generation, "snapshot": self.snapshot_stamp}
+
+    # Write all changes collected in deferred mode.
+    # Many changes made in a short time are written together: one journal append, or one snapshot if
+    # the journal would pass the compaction threshold, a batch was committed or journaling is off.
+    # While a transaction is open nothing is written, because the table holds changes that may still be rolled back.
+    # With merge False, nothing is written if another process changed the files (see StorageBackend.flush).
+
+    def flush(self, merge=True):
+        with self.lock:
+            if self.in_transaction:
+                return True
+            entries, self.pending = self.pending, []
+            snapshot = self.snapshot_pending
+            self.snapshot_pending = False
+        if entries or snapshot:
+            return self.write_entries(entries, snapshot, merge)
+        return True
+
+    # Drop the changes waiting for flush() and load the files again, so the table holds only what was written.
+    # take_changes() then reports None, as any employee may have changed. If the files cannot be read,
+    # the error is raised and the changes stay pending.
+
+    def discard_pending(self):
+        with self.file_lock, self.lock:
+            table = self.load_employees()
+            self.table = table
+            self.next_employee_id = max(self.next_employee_id, table.max_id() + 1)
+            self.pending = []
+            self.snapshot_pending = False
+            self.merged_changes = None
+
+    # Bring the table in line with the files if another process changed them. Must be called with both locks held.
+    # New journal entries are merged one by one; a new snapshot means loading everything again.
+    # own_entries are the changes of this process that are not written yet. They are applied again on top,
+    # and an added employee whose ID was taken in the meantime is given the next free ID. The ID is changed
+    # in the entry and its employee dictionary, so the caller that added the employee sees the new ID.
+
+    def merge_from_disk(self, own_entries):
+        generation = self.load_meta()[1]
+        if generation == self.generation and self.journal.size() == self.journal.offset:
+            return
+        next_id = self.next_employee_id
+        if generation != self.generation:
+            self.table = self.load_employees()
+            taken = self.table
+            changes = None
+        else:
+            entries = self.journal.read_new()
+            changes = []
+            apply_entries(self.table, entries, changes)
+            taken = set()
+            for entry in entries:
+                if entry.get('op') == 'add':
+                    taken.add(entry['employee']['ID'])
+        self.next_employee_id = max(next_id, self.next_employee_id, self.table.max_id() + 1)
+
+        renamed = {}
+        for entry in own_entries:
+            if entry.get('op') == 'add':
+                emp = entry['employee']
+                if emp['ID'] in taken and emp['ID'] not in renamed:
+                    renamed[emp['ID']] = emp['ID'] = self.next_employee_id
+                self.next_employee_id = max(self.next_employee_id, emp['ID'] + 1)
+            elif entry.get('ID') in renamed:
+                entry['ID'] = renamed[entry['ID']]
+        apply_entries(self.table, own_entries, changes)
+
+        if changes is None:
+            self.merged_changes = None
+        elif self.merged_changes is not None:
+            self.merged_changes.extend(changes)
+
+    # Merge the changes another process wrote since the last load, merge or write, see merge_from_disk().
+    # Only the new journal lines are read unless another process wrote a new snapshot.
+    # The cheap check runs first, so calling this often costs two small file reads when nothing changed.
+
+    def reload_if_changed(self, blocking=True):
+        if self.in_transaction or not self.changed_on_disk():
+            return self.take_changes()
+        if not self.file_lock.acquire(blocking):
+            return []
+        try:
+            with self.lock:
+                self.merge_from_disk(list(self.pending))
+        finally:
+            self.file_lock.release()
+        return self.take_changes()
+
+    # Get and reset the changes merged from other processes since the last call.
+
+    def take_changes(self):
+        with self.lock:
+            changes, self.merged_changes = self.merged_changes, []
+        return changes
+
+    # Get a single employee by ID.
+
+    def get(self, emp_id):
+        return self.table.get(emp_id)
+
+    # Get all employees. The table can be iterated, indexed and sliced like a list of employee dictionaries.
+
+    def all(self):
+        return self.table
+
+    # Get the number of employees.
+
+    def count(self):
+        return len(self.table)
+
+    # Get the department and salary columns of the table directly, without building dictionaries.
+
+    def salary_columns(self):
+        return self.table.departments, self.table.salaries
+
+    # Get the next employee ID from the counter.
+
+    def next_id(self):
+        return self.next_employee_id
+
+    # Add a new employee to the table.
+    # If another process added an employee with the same ID before the change is written, the employee
+    # dictionary is given a new ID (see merge_from_disk).
+
+    def add(self, employee):
+        with self.lock:
+            self.table.append(employee)
+            self.next_employee_id = max(self.next_employee_id, employee['ID'] + 1)
+            entry = {"op": "add", "employee": employee}
+            write = self.record_change(entry)
+        if write:
+            self.write_entries([entry])
+
+    # Add many new employees under one lock. Inside a transaction no journal entries are built for them.
+
+    def add_many(self, employees):
+        with self.lock:
+            if self.in_transaction:
+                for employee in employees:
+                    self.table.append(employee)
+                    self.next_employee_id = max(self.next_employee_id, employee['ID'] + 1)
+                    self.note_transaction_change('add', employee['ID'])
+                return
+            entries = []
+            for employee in employees:
+                self.table.append(employee)
+                self.next_employee_id = max(self.next_employee_id, employee['ID'] + 1)
+                entries.append({"op": "add", "employee": employee})
+            write = entries and self.record_changes(entries)
+        if write:
+            self.write_entries(entries)
+
+    # Update an existing employee's information by ID.
+
+    def update(self, emp_id, name, department, salary):
+        with self.lock:
+            if not self.table.update(emp_id, name, department, salary):
+                return False
+            entry = {"op": "update", "ID": emp_id, "name": name, "department": department, "salary": salary}
+            write = self.record_change(entry)
+        if write:
+            self.write_entries([entry])
+        return True
+
+    # Change the salaries of many employees directly in the salary column.
+
+    def update_salaries(self, changes):
+        with self.lock:
+            if self.in_transaction:
+                for emp_id, salary in changes:
+                    if self.table.set_salary(emp_id, salary):
+                        self.note_transaction_change('update', emp_id)
+                return
+            entries = []
+            for emp_id, salary in changes:
+                pos = self.table.index.get(emp_id)
+                if pos is not None and self.table.set_salary(emp_id, salary):
+                    entries.append({"op": "update", "ID": emp_id, "name": self.table.names[pos],
+                                    "department": self.table.departments[pos], "salary": salary})
+            write = entries and self.record_changes(entries)
+        if write:
+            self.write_entries(entries)
+
+    # Remove an employee by ID.
+
+    def remove(self, emp_id):
+        with self.lock:
+            if not self.table.remove(emp_id):
+                return False
+            entry = {"op": "remove", "ID": emp_id}
+            write = self.record_change(entry)
+        if write:
+            self.write_entries([entry])
+        return True
+
+    # Start a transaction by taking a copy of the data to roll back to.
+
+    def begin(self):
+        with self.lock:
+            self.saved_table = self.table.copy()
+            self.saved_next_id = self.next_employee_id
+            self.transaction_changes = {}
+            self.in_transaction = True
+
+    # Validate the changed employees and save the table with a single write.
+    # The table already rejected missing fields and duplicate IDs when the changes were made. Every added or updated
+    # employee is now checked like a loaded record (see record_errors); if one is invalid, ValueError is raised
+    # before anything is written, and the caller rolls the whole batch back.
+    # If another process changed the files in the meantime, the changes of the transaction are turned into journal
+    # entries so they can be applied again on top of the merged data. The entries are also needed for the history.
+    # In deferred mode the write is left to the next flush().
+
+    def commit(self):
+        with self.lock:
+            self.validate_transaction()
+            changes, self.transaction_changes = self.transaction_changes, {}
+            self.in_transaction = False
+            self.saved_table = None
+            if self.deferred:
+                self.pending.extend(self.transaction_entries(changes))
+                self.snapshot_pending = True
+                return
+        with self.file_lock:
+            with self.lock:
+                entries = self.transaction_entries(changes) if self.history is not None or self.changed_on_disk() else []
+            self.write_entries(entries, snapshot=True)
+
+    # Check the employees added or updated in the transaction. Raises ValueError with the first error found.
+    # Only the changed rows are read, so a small batch on a large roster stays cheap.
+
+    def validate_transaction(self):
+        for emp_id, op in self.transaction_changes.items():
+            emp = self.table.get(emp_id) if op != 'remove' else None
+            errors = record_errors(emp, set()) if emp is not None else ()
+            if errors:
+                raise InvalidRecordError(errors[0])
+
+    # Restore the copy taken in begin().
+
+    def rollback(self):
+        with self.lock:
+            self.table = self.saved_table
+            self.next_employee_id = self.saved_next_id
+            self.saved_table = None
+            self.transaction_changes = {}
+            self.in_transaction = False
+
+
+# SQLiteStorage class to store employees in an SQLite database.
+# Only the rows that are needed are read, so startup does not parse the whole roster and memory use stays flat.
+# Every change is also kept in a history table of the same database (see SQLiteHistory in history.py).
+
+class SQLiteStorage(StorageBackend):
+
+    # Constructor to initialize the SQLiteStorage with a database filename.
+
+    def __init__(self, db_path):
+        import sqlite3 # imported here, so programs using the JSON file do not load it at startup
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.history = SQLiteHistory(self.connection)
+        self.load()
+        self.data_version = self.get_data_version()
+
+    # Create the tables, indexes and history triggers if they do not exist yet, in one transaction,
+    # so the history baseline holds exactly the employees the triggers start from.
+    # No employees are read here, so there is no progress to report.
+
+    def load(self, progress=None):
+        self.connection.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS employees (
+                ID INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                department TEXT NOT NULL,
+                salary INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS employees_name ON employees (name COLLATE NOCASE);
+            DROP INDEX IF EXISTS employees_department;
+            CREATE INDEX IF NOT EXISTS employees_department_nocase ON employees (department COLLATE NOCASE);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('next_id', 1);
+        """ + SQLITE_SCHEMA + "COMMIT;")
+
+    # Every change is written by SQLite immediately, so there is nothing left to save.
+
+    def save(self):
+        pass
+
+    # Convert a database row to an employee dictionary.
+
+    @staticmethod
+    def to_employee(row):
+        return {"name": row['name'], "ID": row['ID'], "department": row['department'], "salary": row['salary']}
+
+    # Get a single employee by ID.
+
+    def get(self, emp_id):
+        row = self.connection.execute("SELECT * FROM employees WHERE ID = ?", (emp_id,)).fetchone()
+        return self.to_employee(row) if row else None
+
+    # Get all employees ordered by ID.
+
+    def all(self):
+        return [self.to_employee(row) for row in self.connection.execute("SELECT * FROM employees ORDER BY ID")]
+
+    # Get the number of employees.
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    # Get the next employee ID from the counter in the meta table.
+
+    def next_id(self):
+        return self.connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0]
+
+    # Insert a new employee and move the next ID counter past its ID.
+
+    def add(self, employee):
+        self.connection.execute("INSERT INTO employees (ID, name, department, salary) VALUES (?, ?, ?, ?)",
+                                (employee['ID'], employee['name'], employee['department'], employee['salary']))
+        self.connection.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'next_id'", (employee['ID'] + 1,))
+
+    # Insert many employees with one prepared statement.
+
+    def add_many(self, employees):
+        next_id = 0
+        rows = []
+        for employee in employees:
+            rows.append((employee['ID'], employee['name'], employee['department'], employee['salary']))
+            next_id = max(next_id, employee['ID'] + 1)
+        self.connection.executemany("INSERT INTO employees (ID, name, department, salary) VALUES (?, ?, ?, ?)", rows)
+        self.connection.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'next_id'", (next_id,))
+
+    # Update a single row.
+
+    def update(self, emp_id, name, department, salary):
+        cursor = self.connection.execute("UPDATE employees SET name = ?, department = ?, salary = ? WHERE ID = ?",
+                                         (name, department, salary, emp_id))
+        return cursor.rowcount > 0
+
+    # Update the salaries with one prepared statement.
+
+    def update_salaries(self, changes):
+        self.connection.executemany("UPDATE employees SET salary = ? WHERE ID = ?",
+                                    ((salary, emp_id) for emp_id, salary in changes))
+
+    # Delete a single row.
+
+    def remove(self, emp_id):
+        cursor = self.connection.execute("DELETE FROM employees WHERE ID = ?", (emp_id,))
+        return cursor.rowcount > 0
+
+    # Search names and departments with LIKE, which is case-insensitive for ASCII letters.
+
+    def search(self, term):
+        pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = self.connection.execute(
+            "SELECT * FROM employees WHERE name LIKE ? ESCAPE '\\' OR department LIKE ? ESCAPE '\\' ORDER BY ID",
+            (pattern, pattern))
+        return [self.to_employee(row) for row in rows]
+
+    # Read only the department and salary columns.
+
+    def salary_columns(self):
+        rows = self.connection.execute("SELECT department, salary FROM employees").fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    # Use the department index for department lookups, which ignore case like the base class.
+
+    def find_by_department(self, department):
+        rows = self.connection.execute("SELECT * FROM employees WHERE department = ? COLLATE NOCASE ORDER BY ID", (department,))
+        return [self.to_employee(row) for row in rows]
+
+    # Start an SQLite transaction.
+
+    def begin(self):
+        self.connection.execute("BEGIN")
+
+    # Commit the SQLite transaction. The table constraints already rejected duplicate IDs and missing fields.
+
+    def commit(self):
+        self.connection.execute("COMMIT")
+
+    # Roll back the SQLite transaction.
+
+    def rollback(self):
+        self.connection.execute("ROLLBACK")
+
+    # Get SQLite's data version, which changes whenever another connection commits a change to the database.
+
+    def get_data_version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    # SQLite already locks the database for other processes and every read sees their committed changes.
+    # Only cached indexes need to know about them, so report everything as changed when the data version moved.
+
+    def reload_if_changed(self, blocking=True):
+        version = self.get_data_version()
+        if version == self.data_version:
+            return []
+        self.data_version = version
+        return None
+
+    # Close the database connection.
+
+    def close(self):
+        self.connection.close()
+
+
+# Open the storage backend that matches the file extension.
+# Files ending in .db, .sqlite or .sqlite3 use SQLite, everything else is treated as a JSON, JSON Lines or binary snapshot file.
+# The options are passed to JSONStorage, for example load_now=False to read the file later with load().
+# SQLite reads no employees when it is opened, so it ignores them.
+
+def open_storage(path=FILE_PATH, **options):
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteStorage(path)
+    return JSONStorage(path, **options)
+
+
+# Copy every employee from one backend to another in a single transaction,
+# for example to move an existing employees.json into an SQLite database.
+
+def copy_employees(source, target):
+    target.begin()
+    try:
+        for emp in source.all():
+            target.add(dict(emp))
+        target.commit()
+    except BaseException:
+        target.rollback()
+        raise
@@ -2,34 +2,115 @@
 
 import re
 
+# Patterns for names and departments, compiled once when the module is imported.
+
+NAME_PATTERN = re.compile("^[a-zA-Z ]+$")
+DEPARTMENT_PATTERN = NAME_PATTERN
+
+# Keys every employee record must have.
+
+EMPLOYEE_KEYS = ("ID", "name", "department", "salary")
+
+# Error messages shared by the single-value validators and the record validators.
+
+FORMAT_ERROR = "Invalid employee data format"
+ID_ERROR = "Employee ID must be a whole number"
+DUPLICATE_ID_ERROR = "Duplicate employee IDs found"
+NAME_ERROR = "Name cannot contain special characters or numbers"
+DEPARTMENT_ERROR = "Department cannot contain special characters or numbers"
+SALARY_ERROR = "Salary must be a valid number"
+NEGATIVE_SALARY_ERROR = "Salary cannot be negative"
+
+# Error raised for an employee record that could be read but is not valid.
+# It is a ValueError like every other validation error, so code that catches ValueError still works, but it lets
+# a reader tell an invalid record from a file that could not be read at all.
+
+class InvalidRecordError(ValueError):
+    pass
+
 # Validate JSON data format
 # This function checks if the data is a list of employees and validates each employee's data.
+# Raises ValueError with the first error found; use validate_records to get all of them.
 
 def validate_employees_data(employees):
     if not isinstance(employees, list):
         raise ValueError("Data must be a list of employees")
 
+    errors = validate_records(employees)
+    if errors:
+        raise InvalidRecordError(errors[0][1])
+
+# Validate a single employee record
+# This function checks that the record has all keys with values of the right type, that the name, department
+# and salary are valid and that its ID is not in the set of IDs seen so far.
+# The ID is added to the set, so records can be validated one at a time while they are being read.
+# Raises InvalidRecordError with the first error found.
+
+def validate_employee_data(emp, ids):
+    errors = record_errors(emp, ids)
+    if errors:
+        raise InvalidRecordError(errors[0])
+
+# Validate many employee records in one pass
+# This function runs the full validation of validate_employee_data on every record of any iterable, such as
+# a list or a generator reading a large file, and does not stop at the first invalid record.
+# Returns a list of (record index, error message) pairs, which is empty if all records are valid.
+
+def validate_records(records):
     ids = set()
-    for emp in employees:
-        if not all(k in emp for k in ["ID", "name", "department", "salary"]):
-            raise ValueError("Invalid employee data format")
-        if emp['ID'] in ids:
-            raise ValueError("Duplicate employee IDs found")
-        ids.add(emp['ID'])
+    errors = []
+    for index, emp in enumerate(records):
+        messages = record_errors(emp, ids)
+        if messages:
+            errors.extend((index, message) for message in messages)
+    return errors
+
+# Get the error messages of one employee record
+# This function returns an empty tuple for a valid record, otherwise a list with one message per invalid field.
+# A valid ID is added to the set of IDs seen so far.
+
+def record_errors(emp, ids):
+    if type(emp) is not dict:
+        return [FORMAT_ERROR]
+    try:
+        emp_id, name, dept, salary = emp["ID"], emp["name"], emp["department"], emp["salary"]
+    except KeyError:
+        return [FORMAT_ERROR]
+    if (type(emp_id) is int and emp_id not in ids and type(name) is str and NAME_PATTERN.match(name)
+            and type(dept) is str and DEPARTMENT_PATTERN.match(dept) and type(salary) is int and salary >= 0):
+        ids.add(emp_id)
+        return ()
+
+    errors = []
+    if type(emp_id) is not int:
+        errors.append(ID_ERROR)
+    elif emp_id in ids:
+        errors.append(DUPLICATE_ID_ERROR)
+    else:
+        ids.add(emp_id)
+    if type(name) is not str or not NAME_PATTERN.match(name):
+        errors.append(NAME_ERROR)
+    if type(dept) is not str or not DEPARTMENT_PATTERN.match(dept):
+        errors.append(DEPARTMENT_ERROR)
+    if type(salary) is not int:
+        errors.append(SALARY_ERROR)
+    elif salary < 0:
+        errors.append(NEGATIVE_SALARY_ERROR)
+    return errors
 
 # Validate employee name
 # This function checks if the name is not empty and contains only letters and spaces.
 
 def validate_name(name):
-    if not name or not re.match("^[a-zA-Z ]+$", name):
-        raise ValueError("Name cannot contain special characters or numbers")
+    if not name or not NAME_PATTERN.match(name):
+        raise ValueError(NAME_ERROR)
 
 # Validate department name
 # This function checks if the department is not empty and contains only letters and spaces.
 
 def validate_department(dept):
-    if not dept or not re.match("^[a-zA-Z ]+$", dept):
-        raise ValueError("Department cannot contain special characters or numbers")
+    if not dept or not DEPARTMENT_PATTERN.match(dept):
+        raise ValueError(DEPARTMENT_ERROR)
 
 # Validate salary
 # This function checks if the salary is a valid number and not negative.
@@ -44,6 +125,15 @@ def validate_salary(salary_str):
         raise ValueError("Salary must be a valid number")
     
 
+# Validate salary adjustment amount
+# This function checks if the amount is a whole number. The amount may be negative.
+
+def validate_amount(amount_str):
+    try:
+        return int(amount_str)
+    except ValueError:
+        raise ValueError("Amount must be a whole number")
+
 # Validate salary adjustment percentage
 # This function checks if the percentage is a valid number.   
 